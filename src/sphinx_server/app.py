@@ -3,34 +3,49 @@
 from __future__ import annotations
 
 import logging
+import threading
 from pathlib import Path
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-
-from starlette.middleware.sessions import SessionMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .auth import ensure_default_admin
 from .auto_builder import AutoBuildMonitor
 from .build_service import BuildQueue
 from .config import settings
 from .database import init_db
+from .middleware import LazySessionMiddleware
+from .static_files import CachedStaticFiles
 from .web import account, admin, docs
 
 logger = logging.getLogger(__name__)
 
+_STATIC_DIR = str(Path(__file__).resolve().parent / "web" / "static")
+_BOOT_ONCE = threading.Lock()
+_booted = False
+
+
+def _bootstrap_database() -> None:
+    """Create the schema and seed the default admin once per process."""
+    global _booted
+    with _BOOT_ONCE:
+        if _booted:
+            return
+        logger.debug("Initializing database")
+        init_db()
+        ensure_default_admin()
+        _booted = True
+
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application.
 
     :returns: Fully configured FastAPI instance with routers/static mounts.
     """
-    logger.debug("Initializing database")
-    init_db()
-    ensure_default_admin()
-    app = FastAPI(title="Sphinx Server")
+    _bootstrap_database()
+    app = FastAPI(title="Sphinx Server", default_response_class=ORJSONResponse)
     app.add_middleware(
-        SessionMiddleware,
+        LazySessionMiddleware,
         secret_key=settings.secret_key,
         session_cookie="sphinx_server_session",
         same_site="lax",
@@ -59,8 +74,7 @@ def create_app() -> FastAPI:
     app.include_router(docs.router)
     app.include_router(account.router)
 
-    static_dir = Path(__file__).resolve().parent / "web" / "static"
-    app.mount("/assets", StaticFiles(directory=str(static_dir)), name="assets")
+    app.mount("/assets", CachedStaticFiles(directory=_STATIC_DIR), name="assets")
 
     return app
 
@@ -3,60 +3,136 @@
 from __future__ import annotations
 
 import binascii
+import functools
 import hashlib
 import hmac
 import logging
+import re
 import secrets
-from typing import Callable
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
 from urllib.parse import quote
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError, VerifyMismatchError
 from fastapi import Depends, HTTPException, Request, status
 from sqlmodel import Session, select
 
 from .config import settings
-from .database import engine, get_session, session_scope
+from .database import SessionLocal, get_session
 from .models import User, UserRole
 
+try:
+    import fcntl
+except ModuleNotFoundError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
 PBKDF2_ITERATIONS = 390_000
+ARGON2_PREFIX = "$argon2id$"
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+VERIFY_CACHE_SIZE = 1024
+# Per-process secret keying the verification cache so it never holds plaintext passwords.
+SERVER_PEPPER = secrets.token_bytes(32)
+PASSWORD_ENFORCED_PATHS = ("/account", "/logout")
+_ACCOUNT_ONLY_RE = re.compile(
+    "^(?:" + "|".join(re.escape(prefix) for prefix in PASSWORD_ENFORCED_PATHS) + ")(?:/|$)"
+)
+PASSWORD_FORCE_QUERY = "force=password"
 ROLE_ORDER = {
     UserRole.viewer: 0,
     UserRole.contributor: 1,
     UserRole.administrator: 2,
 }
 
+# Characters that may appear unescaped in the ``next`` query value of a login redirect.
+_REDIRECT_SAFE_BYTES = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-._~/"
+
+_verify_cache: OrderedDict[tuple[str, str], bool] = OrderedDict()
+_verify_cache_lock = threading.Lock()
+
 
 def hash_password(password: str) -> str:
-    """Return a salted PBKDF2 hash for the provided password."""
-    salt = secrets.token_bytes(16)
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS)
-    return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${salt.hex()}${digest.hex()}"
+    """Return an Argon2id hash (PHC string format) for the provided password."""
+    return password_hasher.hash(password)
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
-    """Compare the submitted password against the stored PBKDF2 hash."""
+    """Compare the submitted password against the stored Argon2id or legacy PBKDF2 hash.
+
+    Results are memoized in a bounded LRU keyed by ``HMAC(SERVER_PEPPER, password)``
+    and the stored hash, so repeated checks of the same credential skip the KDF.
+    """
+    key = (hmac.new(SERVER_PEPPER, password.encode("utf-8"), "sha256").hexdigest(), stored_hash)
+    with _verify_cache_lock:
+        cached = _verify_cache.get(key)
+        if cached is not None:
+            _verify_cache.move_to_end(key)
+            return cached
+    result = _verify_password_uncached(password, stored_hash)
+    with _verify_cache_lock:
+        _verify_cache[key] = result
+        _verify_cache.move_to_end(key)
+        while len(_verify_cache) > VERIFY_CACHE_SIZE:
+            _verify_cache.popitem(last=False)
+    return result
+
+
+def password_needs_rehash(stored_hash: str) -> bool:
+    """Return ``True`` when the hash is legacy PBKDF2 or uses outdated Argon2 parameters."""
+    if not stored_hash.startswith(ARGON2_PREFIX):
+        return True
+    try:
+        return password_hasher.check_needs_rehash(stored_hash)
+    except InvalidHashError:
+        return True
+
+
+def _verify_password_uncached(password: str, stored_hash: str) -> bool:
+    """Run the full KDF derivation and constant-time digest comparison."""
+    if stored_hash.startswith(ARGON2_PREFIX):
+        try:
+            return password_hasher.verify(stored_hash, password)
+        except VerifyMismatchError:
+            return False
+        except (VerificationError, InvalidHashError):
+            logger.warning("Stored Argon2 hash could not be verified", exc_info=True)
+            return False
+    parsed = _parse_pbkdf2_hash(stored_hash)
+    if parsed is None:
+        return False
+    iterations, salt, digest = parsed
+    comparison = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return hmac.compare_digest(comparison, digest)
+
+
+@functools.lru_cache(maxsize=VERIFY_CACHE_SIZE)
+def _parse_pbkdf2_hash(stored_hash: str) -> tuple[int, bytes, bytes] | None:
+    """Split a legacy ``pbkdf2_sha256$...`` hash into iterations, salt, and digest."""
     try:
         algo, iterations, salt_hex, digest_hex = stored_hash.split("$", 3)
     except ValueError:
-        return False
+        return None
     if algo != "pbkdf2_sha256":
-        return False
+        return None
     try:
-        iterations_int = int(iterations)
-        salt = bytes.fromhex(salt_hex)
-        digest = bytes.fromhex(digest_hex)
+        return int(iterations), bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
     except (ValueError, binascii.Error):
-        return False
-    comparison = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations_int)
-    return hmac.compare_digest(comparison, digest)
+        return None
 
 
 def _login_redirect(request: Request) -> HTTPException:
     target = str(request.url.path)
     if request.url.query:
         target = f"{target}?{request.url.query}"
-    encoded = quote(target, safe="")
+    if target.isascii() and not target.encode("ascii").translate(None, _REDIRECT_SAFE_BYTES):
+        encoded = target
+    else:
+        encoded = quote(target, safe="")
     return HTTPException(
         status_code=status.HTTP_303_SEE_OTHER,
         headers={"Location": f"/login?next={encoded}"},
@@ -68,12 +144,13 @@ def require_user(
     session: Session = Depends(get_session),
 ) -> User:
     """Ensure there is an authenticated user attached to the request."""
-    user_id = request.session.get("user_id") if "session" in request.scope else None
+    session_data = request.scope.get("session")
+    user_id = session_data.get("user_id") if session_data is not None else None
     if not user_id:
         raise _login_redirect(request)
     user = session.get(User, user_id)
     if not user or not user.is_active:
-        request.session.pop("user_id", None)
+        session_data.pop("user_id", None)
         raise _login_redirect(request)
     request.state.user = user
     if user.must_change_password and not _path_allows_account_only(request.url.path):
@@ -84,10 +161,10 @@ def require_user(
 def require_role(min_role: UserRole) -> Callable[[User], User]:
     """Factory returning a dependency that enforces a minimum role."""
 
+    min_rank = ROLE_ORDER[min_role]
+
     def dependency(user: User = Depends(require_user)) -> User:
-        user_rank = ROLE_ORDER.get(user.role, 0)
-        min_rank = ROLE_ORDER[min_role]
-        if user_rank < min_rank:
+        if ROLE_ORDER[user.role] < min_rank:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
         return user
 
@@ -99,22 +176,25 @@ require_contributor = require_role(UserRole.contributor)
 require_admin = require_role(UserRole.administrator)
 
 
-def get_optional_user(request: Request) -> User | None:
+def get_optional_user(
+    request: Request,
+    session: Session = Depends(get_session),
+) -> User | None:
     """Return the authenticated user if a valid session cookie exists."""
-    user_id = request.session.get("user_id") if "session" in request.scope else None
+    session_data = request.scope.get("session")
+    user_id = session_data.get("user_id") if session_data is not None else None
     if not user_id:
         return None
-    with session_scope() as session:
-        user = session.get(User, user_id)
-        if user and user.is_active:
-            request.state.user = user
-            return user
-    request.session.pop("user_id", None)
+    user = session.get(User, user_id)
+    if user and user.is_active:
+        request.state.user = user
+        return user
+    session_data.pop("user_id", None)
     return None
 
 
 def _path_allows_account_only(path: str) -> bool:
-    return any(path.startswith(prefix) for prefix in PASSWORD_ENFORCED_PATHS)
+    return _ACCOUNT_ONLY_RE.match(path) is not None
 
 
 def _password_change_redirect() -> HTTPException:
@@ -124,26 +204,44 @@ def _password_change_redirect() -> HTTPException:
     )
 
 
+@contextmanager
+def _seed_lock(directory: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock so concurrent workers seed only once."""
+    if fcntl is None:
+        yield
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    with (directory / ".admin_seed.lock").open("w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
 def ensure_default_admin() -> None:
-    """Seed the database with a default admin user when none exist."""
-    with Session(engine) as session:
-        existing = session.exec(select(User).limit(1)).first()
-        if existing:
-            return
-        username = "admin"
-        password = "password"
-        admin = User(
-            username=username,
-            full_name="Administrator",
-            role=UserRole.administrator,
-            password_hash=hash_password(password),
-            must_change_password=True,
-        )
-        session.add(admin)
-        session.commit()
-        logger.warning(
-            "No users found, created default admin account '%s' with a temporary password. Password change is required on first login.",
-            username,
-        )
-PASSWORD_ENFORCED_PATHS = ("/account", "/logout")
-PASSWORD_FORCE_QUERY = "force=password"
+    """Seed the database with a default admin user when none exist.
+
+    The existence check runs under an advisory lock in the data directory so
+    concurrent workers seed only once.
+    """
+    with _seed_lock(settings.data_dir):
+        with SessionLocal() as session:
+            existing = session.exec(select(User).limit(1)).first()
+            if existing:
+                return
+            username = "admin"
+            password = "password"
+            admin = User(
+                username=username,
+                full_name="Administrator",
+                role=UserRole.administrator,
+                password_hash=hash_password(password),
+                must_change_password=True,
+            )
+            session.add(admin)
+            session.commit()
+            logger.warning(
+                "No users found, created default admin account '%s' with a temporary password. Password change is required on first login.",
+                username,
+            )
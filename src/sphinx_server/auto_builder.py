@@ -3,17 +3,62 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 
-from sqlmodel import Session, select
+from sqlalchemy import exists, lambda_stmt
+from sqlmodel import select
 
 from .config import settings
-from .database import engine
-from .git_utils import GitError, get_remote_sha
-from .models import Build, BuildStatus, RefType, Repository, TrackedTarget
-from .build_service import BuildQueue, enqueue_target_build
+from .database import SessionLocal
+from .git_utils import GitError, get_remote_sha, prune_remote_refs_cache
+from .models import Build, RefType, Repository, TrackedTarget
+from .build_service import BuildQueue, create_target_build
 
 logger = logging.getLogger(__name__)
+FULL_SHA_PATTERN = re.compile(r"[0-9a-f]{40}")
+TARGET_STREAM_BATCH = 500
+SHUTDOWN_GRACE_SECONDS = 10
+
+
+class TargetSnapshot(NamedTuple):
+    """Target and repository columns needed to probe a ref, without ORM state."""
+
+    id: int
+    repository_id: int
+    ref_type: RefType
+    ref_name: str
+    last_sha: str | None
+    url: str
+    auth_token: str | None
+    deploy_key: str | None
+
+
+# Built once as a lambda statement so each poll reuses the cached compiled SQL
+# instead of reconstructing and re-keying the select.
+_AUTO_BUILD_CANDIDATES = lambda_stmt(
+    lambda: select(
+        TrackedTarget.id,
+        TrackedTarget.repository_id,
+        TrackedTarget.ref_type,
+        TrackedTarget.ref_name,
+        TrackedTarget.last_sha,
+        Repository.url,
+        Repository.auth_token,
+        Repository.deploy_key,
+    )
+    .join(Repository, TrackedTarget.repository_id == Repository.id)
+    .where(
+        (TrackedTarget.auto_build == True)
+        & ~exists().where(
+            (Build.target_id == TrackedTarget.id)
+            & (Build.is_active == True)
+        )
+    )
+)
 
 
 class AutoBuildMonitor:
@@ -23,64 +68,164 @@ class AutoBuildMonitor:
         """Store the queue used to enqueue builds."""
         self.queue = queue
         self.task: asyncio.Task[None] | None = None
+        self._wake_event = asyncio.Event()
+        self._stop_event = asyncio.Event()
+        self._session_factory = SessionLocal
+        self._git_executor: ThreadPoolExecutor | None = None
 
     async def startup(self) -> None:
         """Launch the monitoring loop if it is not already running."""
         if self.task:
             return
         logger.info("Starting auto-build monitor loop")
+        self._stop_event.clear()
+        self._git_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.auto_build_max_concurrency),
+            thread_name_prefix="git-ls-remote",
+        )
         self.task = asyncio.create_task(self._loop())
 
     async def shutdown(self) -> None:
         """Stop the monitoring loop gracefully."""
         if self.task:
             logger.info("Stopping auto-build monitor loop")
-            self.task.cancel()
+            self._stop_event.set()
+            self._wake_event.set()
             try:
-                await self.task
+                await asyncio.wait_for(self.task, timeout=SHUTDOWN_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning("Auto-build monitor did not stop within %ss; cancelled", SHUTDOWN_GRACE_SECONDS)
             except asyncio.CancelledError:
                 pass
             self.task = None
+        if self._git_executor:
+            self._git_executor.shutdown(wait=False, cancel_futures=True)
+            self._git_executor = None
+
+    def poke(self) -> None:
+        """Wake the monitoring loop so it re-checks targets immediately."""
+        self._wake_event.set()
 
     async def _loop(self) -> None:
-        """Sleep for the configured interval then scan tracked targets."""
-        interval = max(10, settings.auto_build_interval_seconds)
-        while True:
-            await asyncio.sleep(interval)
-            await self._check_targets()
-
-    async def _check_targets(self) -> None:
-        """Inspect every auto-build-enabled target and queue builds if needed."""
-        with Session(engine) as session:
-            targets = session.exec(select(TrackedTarget).where(TrackedTarget.auto_build == True)).all()
-            for target in targets:
-                repo = session.get(Repository, target.repository_id)
-                if not repo:
-                    continue
-                pending = session.exec(
-                    select(Build)
-                    .where(
-                        (Build.target_id == target.id)
-                        & (Build.status.in_([BuildStatus.queued, BuildStatus.running]))
-                    )
-                    .limit(1)
-                ).first()
-                if pending:
-                    continue
+        """Sleep for the configured interval then scan tracked targets.
+
+        Consecutive polls that enqueue nothing double the sleep (up to 8x the
+        interval, bounded by ``auto_build_max_backoff_seconds``); any enqueued
+        build or :meth:`poke` restores the base interval. The loop returns as
+        soon as :meth:`shutdown` sets the stop event.
+        """
+        idle_streak = 0
+        while not self._stop_event.is_set():
+            interval = max(10, settings.auto_build_interval_seconds)
+            max_delay = max(interval, settings.auto_build_max_backoff_seconds)
+            delay = min(interval * (1 << idle_streak), max_delay)
+            if await self._wait(delay):
+                idle_streak = 0
+            if self._stop_event.is_set():
+                break
+            enqueued = await self._check_targets()
+            idle_streak = 0 if enqueued else min(idle_streak + 1, 3)
+
+    async def _wait(self, delay: float) -> bool:
+        """Sleep for ``delay`` seconds; return ``True`` if woken early.
+
+        Both :meth:`poke` and :meth:`shutdown` set the wake event, so a stop
+        request never waits out the remaining interval.
+        """
+        try:
+            await asyncio.wait_for(self._wake_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            return False
+        self._wake_event.clear()
+        return True
 
+    async def _check_targets(self) -> int:
+        """Inspect every auto-build-enabled target and queue builds if needed.
+
+        :returns: Number of builds enqueued during this pass.
+        """
+        with self._session_factory() as session:
+            rows = session.execute(
+                _AUTO_BUILD_CANDIDATES,
+                execution_options={"yield_per": TARGET_STREAM_BATCH},
+            )
+            candidates = [TargetSnapshot(*row) for row in rows]
+        if not candidates:
+            prune_remote_refs_cache(())
+            return 0
+        semaphore = asyncio.Semaphore(max(1, settings.auto_build_max_concurrency))
+
+        async def probe(target: TargetSnapshot) -> str | None:
+            async with semaphore:
+                return await self._remote_sha(target)
+
+        results = await asyncio.gather(
+            *(probe(target) for target in candidates),
+            return_exceptions=True,
+        )
+        prune_remote_refs_cache((target.url, target.auth_token, target.deploy_key) for target in candidates)
+        changed: list[TargetSnapshot] = []
+        for target, remote_sha in zip(candidates, results):
+            if isinstance(remote_sha, GitError):
+                logger.warning(
+                    "Failed to fetch remote SHA for repo %s target %s", target.repository_id, target.id
+                )
+                continue
+            if isinstance(remote_sha, BaseException):
+                raise remote_sha
+            if not remote_sha or remote_sha == target.last_sha:
+                continue
+            logger.info("Detected new commit for repo %s target %s", target.repository_id, target.id)
+            changed.append(target)
+        # Never wait on a full queue: rows committed here must be enqueued right
+        # away, and targets left out are picked up again on the next poll.
+        free = self.queue.free_slots()
+        if free is not None and len(changed) > free:
+            logger.warning("Build queue is full; deferring %s auto builds", len(changed) - free)
+            changed = changed[:free]
+        if not changed:
+            return 0
+
+        builds = []
+        with self._session_factory() as session, session.begin():
+            for target in changed:
                 try:
-                    remote_sha = await asyncio.to_thread(
-                        get_remote_sha,
-                        repo.url,
-                        repo.auth_token,
-                        target.ref_type,
-                        target.ref_name,
-                        repo.deploy_key,
-                    )
-                except GitError:
-                    logger.warning("Failed to fetch remote SHA for repo %s target %s", repo.id, target.id)
-                    continue
-                if not remote_sha or remote_sha == target.last_sha:
-                    continue
-                logger.info("Detected new commit for repo %s target %s", repo.id, target.id)
-                await enqueue_target_build(target.id, session, self.queue, triggered_by="auto")
+                    builds.append(create_target_build(target.id, session, triggered_by="auto"))
+                except ValueError:
+                    logger.warning("Target %s disappeared before its auto build was queued", target.id)
+        for build in builds:
+            logger.info("Queued build %s for target %s (triggered_by=auto)", build.id, build.target_id)
+            self.queue.try_enqueue(build.id)
+        return len(builds)
+
+    async def _remote_sha(self, target: TargetSnapshot) -> str | None:
+        """Return the remote SHA for a target without blocking the event loop.
+
+        Refs that are already a full commit SHA resolve to themselves without a
+        network call. Everything else goes through :func:`get_remote_sha` on the
+        git executor, whose per-repository listing cache lets a burst of
+        targets share one probe for ``remote_sha_ttl_seconds`` (capped below
+        the polling interval).
+        """
+        if FULL_SHA_PATTERN.fullmatch(target.ref_name):
+            return target.ref_name
+        return await asyncio.get_running_loop().run_in_executor(
+            self._git_executor,
+            functools.partial(
+                get_remote_sha,
+                target.url,
+                target.auth_token,
+                target.ref_type,
+                target.ref_name,
+                target.deploy_key,
+                max_age=_remote_sha_ttl(),
+            ),
+        )
+
+
+def _remote_sha_ttl() -> float:
+    """Return how long a remote SHA may be reused, capped below the polling interval."""
+    return min(
+        settings.remote_sha_ttl_seconds,
+        max(10, settings.auto_build_interval_seconds) - 1,
+    )
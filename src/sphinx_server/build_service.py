@@ -3,47 +3,90 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
 import shutil
 import subprocess
+import threading
 import time
-from concurrent.futures import ProcessPoolExecutor
-from contextlib import suppress
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Iterator, Literal
 
 try:
     import tomllib
 except ModuleNotFoundError:  # pragma: no cover - Python < 3.11
     import tomli as tomllib  # type: ignore
 
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from .config import get_settings, settings
-from .database import engine
-from .git_utils import clone_or_fetch, run_git
-from .models import Build, BuildStatus, RefType, Repository, TrackedTarget
-from .time_utils import format_local_datetime
+from .database import SessionLocal
+from .git_utils import COMMIT_SHA_PATTERN, GitError, clone_or_fetch, get_remote_sha, read_head_sha
+from .models import Build, BuildStatus, Repository, TrackedTarget
+from .time_utils import format_local_datetime, utc_now
 
 logger = logging.getLogger(__name__)
 DOC_DEPENDENCY_KEYS = {"docs", "doc", "documentation", "dev"}
 PY_VERSION_PATTERN = re.compile(r"(\d+(?:\.\d+){0,2})")
+_LEADING_INT_PATTERN = re.compile(r"\d+")
+_VERSION_OPERATOR_CHARS = frozenset(">=<!~")
+NAV_MARKER = b"__SPHINX_SERVER_NAV"
+BODY_CLOSE_PATTERN = re.compile(rb"</body\s*>", re.IGNORECASE)
+INJECT_MAX_WORKERS = 32
+INJECT_TAIL_BYTES = 64 * 1024
+_NAV_SCRIPT_PREFIX = b"<script>window.__SPHINX_SERVER_NAV=1;"
+_NAV_SCRIPT_SUFFIX = b';</script>\n<script defer src="/assets/sphinx-nav.js"></script>\n'
+WORKSPACE_TRASH_SUBDIR = ".trash"
+_BIN_DIR_NAME = "Scripts" if os.name == "nt" else "bin"
+_PYTHON_EXE = "python.exe" if os.name == "nt" else "python"
+_SPHINX_BUILD_EXE = "sphinx-build.exe" if os.name == "nt" else "sphinx-build"
+_RM_EXECUTABLE = shutil.which("rm") if os.name != "nt" else None
+ENV_READY_SENTINEL = ".ready"
+ENV_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+ENV_KEY_FILES = (
+    "pyproject.toml",
+    "uv.lock",
+    "requirements.lock",
+    "requirements.txt",
+    "docs/requirements.txt",
+    "docs/requirements-docs.txt",
+    ".python-version",
+)
+_KEYED_LOCKS: dict[tuple[str, Any], threading.Lock] = {}
+_KEYED_LOCKS_GUARD = threading.Lock()
+_GLOBAL_EXECUTOR: BuildExecutor | None = None
+_GLOBAL_EXECUTOR_LOCK = threading.Lock()
 
 
 class BuildExecutor:
-    """Runs build jobs inside a process pool with isolated workspaces."""
+    """Runs build jobs inside a thread pool with isolated workspaces.
+
+    Builds spend their time waiting on git, installers and ``sphinx-build``
+    subprocesses, so threads give the same parallelism as processes without
+    the per-worker interpreter and pickling overhead.
+    """
 
     def __init__(self) -> None:
-        """Instantiate the underlying :class:`~concurrent.futures.ProcessPoolExecutor`."""
+        """Instantiate the underlying :class:`~concurrent.futures.ThreadPoolExecutor`."""
         logger.debug("Initializing BuildExecutor with %s workers", settings.build_processes)
-        self.pool = ProcessPoolExecutor(max_workers=settings.build_processes)
+        _configure_installer_caches(settings.installer_cache_dir)
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, settings.build_processes),
+            thread_name_prefix="sphinx-build",
+        )
 
     async def run_build(self, build_id: int) -> None:
-        """Delegate a build job to the process pool.
+        """Delegate a build job to the thread pool.
 
         :param build_id: Primary key of the :class:`sphinx_server.models.Build`.
         """
@@ -57,36 +100,79 @@ class BuildExecutor:
         self.pool.shutdown(wait=False)
 
 
+def get_build_executor() -> BuildExecutor:
+    """Return the process-wide :class:`BuildExecutor`, creating it on first use.
+
+    The executor outlives individual :class:`BuildQueue` instances and is shut
+    down when the interpreter exits.
+    """
+    global _GLOBAL_EXECUTOR
+    with _GLOBAL_EXECUTOR_LOCK:
+        if _GLOBAL_EXECUTOR is None:
+            _GLOBAL_EXECUTOR = BuildExecutor()
+            atexit.register(_GLOBAL_EXECUTOR.pool.shutdown, wait=False, cancel_futures=True)
+        return _GLOBAL_EXECUTOR
+
+
 class BuildQueue:
-    """Simple asyncio queue consuming build jobs sequentially."""
+    """Asyncio queue feeding build jobs to a fixed set of concurrent workers."""
 
     def __init__(self, executor: BuildExecutor | None = None) -> None:
-        """Create the queue wrapper around the provided executor."""
-        self.executor = executor or BuildExecutor()
-        self.queue: asyncio.Queue[int] = asyncio.Queue()
-        self.worker_task: asyncio.Task[None] | None = None
+        """Create the queue wrapper around the provided or shared executor."""
+        self.executor = executor or get_build_executor()
+        self.queue: asyncio.Queue[int] = asyncio.Queue(maxsize=max(0, settings.build_queue_maxsize))
+        self.worker_tasks: list[asyncio.Task[None]] = []
 
     async def startup(self) -> None:
-        """Spin up the background worker task once."""
-        if self.worker_task:
+        """Spin up one worker task per configured build process, once."""
+        if self.worker_tasks:
             return
-        logger.debug("Starting build queue worker")
-        self.worker_task = asyncio.create_task(self._worker())
+        workers = max(1, settings.build_processes)
+        logger.debug("Starting %s build queue workers", workers)
+        _rmtree_in_background(settings.workspace_root / WORKSPACE_TRASH_SUBDIR)
+        self.worker_tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
 
     async def shutdown(self) -> None:
-        """Cancel the worker and close the executor."""
-        if self.worker_task:
-            self.worker_task.cancel()
+        """Cancel the workers; the executor is left running for reuse.
+
+        Callers that passed their own executor are responsible for calling
+        :meth:`BuildExecutor.shutdown`; the shared one stops at interpreter exit.
+        """
+        for task in self.worker_tasks:
+            task.cancel()
+        for task in self.worker_tasks:
             with suppress(asyncio.CancelledError):
-                await self.worker_task
-            self.worker_task = None
-        await self.executor.shutdown()
+                await task
+        self.worker_tasks = []
 
     async def enqueue(self, build_id: int) -> None:
-        """Queue a build identifier for background processing."""
+        """Queue a build identifier, waiting for room when the queue is full."""
         logger.debug("Enqueuing build %s", build_id)
         await self.queue.put(build_id)
 
+    def try_enqueue(self, build_id: int) -> None:
+        """Queue a build identifier without waiting.
+
+        :raises asyncio.QueueFull: If ``build_queue_maxsize`` builds are already waiting.
+        """
+        logger.debug("Enqueuing build %s", build_id)
+        self.queue.put_nowait(build_id)
+
+    def full(self) -> bool:
+        """Return ``True`` when no more builds can be queued without waiting."""
+        return self.queue.full()
+
+    def free_slots(self) -> int | None:
+        """Return how many builds can be queued without waiting (``None`` if unbounded)."""
+        if self.queue.maxsize <= 0:
+            return None
+        return max(0, self.queue.maxsize - self.queue.qsize())
+
+    def has_room(self, count: int) -> bool:
+        """Return ``True`` when ``count`` builds can be queued without waiting."""
+        free = self.free_slots()
+        return free is None or free >= count
+
     async def _worker(self) -> None:
         """Continuously pull build ids from the queue and execute them."""
         while True:
@@ -97,23 +183,74 @@ class BuildQueue:
                 self.queue.task_done()
 
 
+def _configure_installer_caches(cache_root: Path) -> None:
+    """Point uv and pip at shared caches under the data directory.
+
+    Keeping the cache on the same filesystem as the environments lets uv
+    hardlink wheels into each venv. Explicit ``UV_CACHE_DIR`` /
+    ``PIP_CACHE_DIR`` values in the environment are left untouched.
+    """
+    uv_cache = cache_root / "uv"
+    pip_cache = cache_root / "pip"
+    uv_cache.mkdir(parents=True, exist_ok=True)
+    pip_cache.mkdir(parents=True, exist_ok=True)
+    os.environ.setdefault("UV_CACHE_DIR", str(uv_cache))
+    os.environ.setdefault("PIP_CACHE_DIR", str(pip_cache))
+
+
+@contextmanager
+def _keyed_lock(kind: str, key: Any) -> Iterator[None]:
+    """Hold a process-wide lock dedicated to ``(kind, key)``."""
+    with _KEYED_LOCKS_GUARD:
+        lock = _KEYED_LOCKS.setdefault((kind, key), threading.Lock())
+    with lock:
+        yield
+
+
+@contextmanager
+def _target_lock(target_id: int) -> Iterator[None]:
+    """Serialize builds of the same target, which share an artifact directory."""
+    with _keyed_lock("target", target_id):
+        yield
+
+
 def _process_build(build_id: int) -> None:
-    """Run every build step synchronously inside the worker process.
+    """Run a build in a worker thread, one build per target at a time.
+
+    :param build_id: Identifier of the build row to load and update.
+    """
+    with SessionLocal() as session:
+        build = session.get(Build, build_id)
+        target_id = build.target_id if build else None
+    if target_id is None:
+        logger.error("Build %s no longer exists", build_id)
+        return
+    with _target_lock(target_id):
+        _run_build(build_id)
+
+
+def _run_build(build_id: int) -> None:
+    """Run every build step synchronously inside the worker thread.
 
     :param build_id: Identifier of the build row to load and update.
     """
     local_settings = get_settings()
     workspace = local_settings.workspace_root / f"build_{build_id}"
     workspace_repo = workspace / "repo"
-    env_dir = workspace / "venv"
 
-    with Session(engine) as session:
-        build = session.get(Build, build_id)
-        if not build:
+    # Rows stay loaded after the "running" commit so the build does not reopen
+    # a read transaction (and hold the SQLite lock) until the final commit.
+    with SessionLocal() as session:
+        row = session.exec(
+            select(Build, Repository, TrackedTarget)
+            .outerjoin(Repository, Build.repository_id == Repository.id)
+            .outerjoin(TrackedTarget, Build.target_id == TrackedTarget.id)
+            .where(Build.id == build_id)
+        ).one_or_none()
+        if row is None:
             logger.error("Build %s no longer exists", build_id)
             return
-        repo = session.get(Repository, build.repository_id)
-        target = session.get(TrackedTarget, build.target_id)
+        build, repo, target = row
         if not repo or not target:
             logger.error("Missing repo/target for build %s", build_id)
             return
@@ -121,38 +258,50 @@ def _process_build(build_id: int) -> None:
         log_path = local_settings.log_dir / f"build_{build.id}.log"
         build.log_path = str(log_path)
         build.status = BuildStatus.running
-        build.started_at = datetime.utcnow()
+        build.started_at = utc_now()
         session.add(build)
         session.commit()
+        started = time.monotonic()
 
         try:
             logger.info("Starting build %s for repo %s target %s", build.id, repo.id, target.id)
+            artifact_dir = local_settings.build_output_dir / str(repo.id) / target.slug()
+            if not build.force and target.last_sha and artifact_dir.exists():
+                remote_sha = _published_ref_sha(repo, target)
+                if remote_sha == target.last_sha:
+                    build.sha = remote_sha
+                    _mark_build_skipped(build, artifact_dir, log_path, started)
+                    return
             _prepare_workspace(workspace)
-            time.sleep(5)
-            clone_or_fetch(
-                repo.url,
-                repo.auth_token,
-                workspace_repo,
-                log_path,
-                timeout=settings.git_default_timeout,
-                retries=2,
-                deploy_key=repo.deploy_key,
-                ssh_workdir=workspace,
-            )
-            checkout_ref = target.ref_name
-            run_git(["checkout", checkout_ref], cwd=workspace_repo, log_file=log_path)
-            if target.ref_type == RefType.branch:
-                run_git(["pull"], cwd=workspace_repo, log_file=log_path)
+            with _keyed_lock("mirror", repo.id):
+                clone_or_fetch(
+                    repo.url,
+                    repo.auth_token,
+                    workspace_repo,
+                    log_path,
+                    timeout=settings.git_default_timeout,
+                    retries=2,
+                    deploy_key=repo.deploy_key,
+                    ref_name=target.ref_name,
+                    mirror_dir=repo_mirror_dir(repo.id),
+                    ref_type=target.ref_type,
+                )
 
-            session.refresh(build)
             build.sha = _current_sha(workspace_repo, log_path)
-
-            artifact_dir = local_settings.build_output_dir / str(repo.id) / target.slug()
+            if not build.force and build.sha == target.last_sha and artifact_dir.exists():
+                _mark_build_skipped(build, artifact_dir, log_path, started)
+                return
             env_manager = target.environment_manager or settings.environment_manager
-            env_bin = _prepare_repo_environment(env_dir, workspace_repo, log_path, env_manager)
+            pyproject_data = _load_pyproject(workspace_repo / "pyproject.toml")
+            env_dir = _environment_dir(
+                local_settings.env_root_dir, repo.id, target.id, workspace_repo, env_manager
+            )
+            env_bin = _prepare_repo_environment(
+                env_dir, workspace_repo, log_path, env_manager, pyproject_data
+            )
             _build_sphinx(workspace_repo / repo.docs_path, artifact_dir, log_path, env_bin)
 
-            metadata = _extract_project_metadata(workspace_repo)
+            metadata = _extract_project_metadata(pyproject_data)
             _maybe_update_repo_metadata(session, repo, target, metadata)
 
             version_hint = (
@@ -160,7 +309,7 @@ def _process_build(build_id: int) -> None:
                 or repo.project_version
                 or "unknown"
             )
-            completion_time = datetime.utcnow()
+            completion_time = utc_now()
             _inject_navigation_links(
                 artifact_dir,
                 repo.id,
@@ -171,8 +320,7 @@ def _process_build(build_id: int) -> None:
 
             build.status = BuildStatus.success
             build.finished_at = completion_time
-            if build.started_at and build.finished_at:
-                build.duration_seconds = (build.finished_at - build.started_at).total_seconds()
+            build.duration_seconds = time.monotonic() - started
             build.artifact_path = str(artifact_dir)
             target.last_sha = build.sha
             session.add(target)
@@ -181,14 +329,50 @@ def _process_build(build_id: int) -> None:
             with log_path.open("a", encoding="utf-8") as log:
                 log.write(f"\nBuild failed: {exc}\n")
             build.status = BuildStatus.failed
-            build.finished_at = datetime.utcnow()
-            if build.started_at and build.finished_at:
-                build.duration_seconds = (build.finished_at - build.started_at).total_seconds()
+            build.finished_at = utc_now()
+            build.duration_seconds = time.monotonic() - started
         finally:
             logger.info("Completed build %s (status=%s)", build_id, build.status)
             session.add(build)
             session.commit()
-            shutil.rmtree(workspace, ignore_errors=True)
+            _discard_workspace(workspace)
+
+
+def repo_mirror_dir(repo_id: int) -> Path:
+    """Return the bare mirror shared by every build of a repository."""
+    return get_settings().repo_cache_dir / f"repo_{repo_id}.git"
+
+
+def _published_ref_sha(repo: Repository, target: TrackedTarget) -> str | None:
+    """Return the remote SHA of a target's ref with a single ``git ls-remote``.
+
+    Failures return ``None`` so the build simply proceeds with a clone.
+    """
+    if COMMIT_SHA_PATTERN.fullmatch(target.ref_name):
+        return target.ref_name
+    try:
+        return get_remote_sha(
+            repo.url,
+            repo.auth_token,
+            target.ref_type,
+            target.ref_name,
+            deploy_key=repo.deploy_key,
+            max_age=0,
+        )
+    except (GitError, subprocess.TimeoutExpired) as exc:
+        logger.warning("Could not probe %s before building: %s", target.ref_name, exc)
+        return None
+
+
+def _mark_build_skipped(build: Build, artifact_dir: Path, log_path: Path, started: float) -> None:
+    """Record a build as successful without rebuilding an already published SHA."""
+    logger.info("Build %s skipped: %s is already published", build.id, build.sha)
+    with log_path.open("a", encoding="utf-8") as log:
+        log.write(f"\nSkipping build: {build.sha} is already published\n")
+    build.status = BuildStatus.success
+    build.finished_at = utc_now()
+    build.duration_seconds = time.monotonic() - started
+    build.artifact_path = str(artifact_dir)
 
 
 def _prepare_workspace(workspace: Path) -> None:
@@ -198,18 +382,77 @@ def _prepare_workspace(workspace: Path) -> None:
     """
     if workspace.exists():
         logger.debug("Cleaning existing workspace %s", workspace)
-        shutil.rmtree(workspace)
+        _fast_rmtree(workspace)
     workspace.mkdir(parents=True, exist_ok=True)
     logger.debug("Created workspace %s", workspace)
 
 
+def _discard_workspace(workspace: Path) -> None:
+    """Move a finished workspace into the trash and delete it off-thread.
+
+    The rename is instant, so the worker is free for the next build while the
+    checkout is unlinked in the background.
+
+    :param workspace: Build workspace to remove.
+    """
+    trash = workspace.parent / WORKSPACE_TRASH_SUBDIR / f"{workspace.name}_{uuid.uuid4().hex}"
+    try:
+        trash.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(workspace, trash)
+    except OSError:
+        _fast_rmtree(workspace, ignore_errors=True)
+        return
+    _rmtree_in_background(trash)
+
+
+def _fast_rmtree(path: Path, ignore_errors: bool = False) -> None:
+    """Remove a directory tree, preferring native ``rm -rf`` on POSIX.
+
+    ``rm`` unlinks large trees (venvs, checkouts, HTML output) much faster
+    than :func:`shutil.rmtree`; it is still used as the fallback so errors
+    surface the same way.
+
+    :param path: Directory to delete.
+    :param ignore_errors: Passed to the :func:`shutil.rmtree` fallback.
+    """
+    if _RM_EXECUTABLE:
+        proc = subprocess.run(
+            [_RM_EXECUTABLE, "-rf", "--", str(path)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        if proc.returncode == 0:
+            return
+    shutil.rmtree(path, ignore_errors=ignore_errors)
+
+
+def _rmtree_in_background(path: Path) -> None:
+    """Delete ``path`` recursively from a daemon thread, ignoring errors."""
+    if not path.exists():
+        return
+    threading.Thread(
+        target=_fast_rmtree,
+        args=(path,),
+        kwargs={"ignore_errors": True},
+        name="workspace-trash",
+        daemon=True,
+    ).start()
+
+
 def _current_sha(repo_path: Path, log_path: Path) -> str:
     """Return the SHA of ``HEAD`` for the cloned repository.
 
+    ``HEAD`` is read straight from the ``.git`` directory; ``git rev-parse``
+    only runs when that is not possible.
+
     :param repo_path: Local checkout path.
     :param log_path: Build log file receiving git output.
     :returns: 40-character SHA or ``\"unknown\"`` on error.
     """
+    sha = read_head_sha(repo_path)
+    if sha:
+        return sha
     cmd = ["git", "rev-parse", "HEAD"]
     with log_path.open("a", encoding="utf-8") as log:
         proc = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True, check=False)
@@ -219,48 +462,177 @@ def _current_sha(repo_path: Path, log_path: Path) -> str:
         return proc.stdout.strip()
 
 
+def _environment_dir(env_root: Path, repo_id: int, target_id: int, repo_path: Path, manager: str) -> Path:
+    """Return the cached environment directory for a target's dependency files.
+
+    The directory name hashes the files that drive dependency installation, so
+    builds of a target share an environment until one of them changes. Each
+    target gets its own environment because builds reinstall their checkout
+    of the project into it, and builds of other refs run concurrently.
+
+    :param env_root: Root directory holding cached environments.
+    :param repo_id: Repository identifier.
+    :param target_id: Tracked target identifier.
+    :param repo_path: Local repository clone used to read dependency files.
+    :param manager: Environment backend used for provisioning.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(manager.encode())
+    digest.update(b"\0" + (settings.pyenv_default_python_version or "").encode())
+    for name in ENV_KEY_FILES:
+        path = repo_path / name
+        digest.update(b"\0" + name.encode() + b"\0")
+        if path.is_file():
+            digest.update(path.read_bytes())
+    return env_root / f"{repo_id}_{target_id}_{digest.hexdigest()}"
+
+
 def _prepare_repo_environment(
     env_dir: Path,
     repo_path: Path,
     log_path: Path,
     manager: Literal["uv", "pyenv"],
+    pyproject_data: dict[str, Any],
 ) -> Path:
     """Provision a virtual environment with project dependencies.
 
+    A ready environment from a previous build is reused; only the project
+    itself is reinstalled so the docs see the checked-out code.
+
     :param env_dir: Directory where the venv will live.
     :param repo_path: Local repository clone used to read dependency files.
     :param log_path: Log file to append command output.
     :param manager: Environment backend to use for provisioning.
+    :param pyproject_data: Parsed ``pyproject.toml`` (empty when absent).
     :returns: Path to the environment ``bin`` directory.
     """
-    if env_dir.exists():
-        shutil.rmtree(env_dir)
-    env_dir.parent.mkdir(parents=True, exist_ok=True)
+    if manager not in ("uv", "pyenv"):
+        raise RuntimeError(f"Unsupported environment manager: {manager}")
+    installer: Literal["uv", "pip"] = "uv" if manager == "uv" else "pip"
+    bin_dir = env_dir / _BIN_DIR_NAME
+    python_bin = bin_dir / _PYTHON_EXE
+    sentinel = env_dir / ENV_READY_SENTINEL
+
+    with _keyed_lock("env", env_dir):
+        if sentinel.exists() and python_bin.exists():
+            logger.debug("Reusing environment %s", env_dir)
+            with log_path.open("a", encoding="utf-8") as log:
+                log.write(f"\nReusing cached environment {env_dir}\n")
+            _reinstall_project(repo_path, python_bin, log_path, installer=installer)
+            sentinel.touch()
+            return bin_dir
+
+        if env_dir.exists():
+            _fast_rmtree(env_dir)
+        env_dir.parent.mkdir(parents=True, exist_ok=True)
+        _prune_stale_environments(env_dir.parent)
+        if manager == "uv":
+            bin_dir = _prepare_uv_environment(env_dir, repo_path, log_path, pyproject_data)
+        else:
+            bin_dir = _prepare_pyenv_environment(env_dir, repo_path, log_path, pyproject_data)
+        tmp_sentinel = env_dir / f"{ENV_READY_SENTINEL}.tmp"
+        tmp_sentinel.write_text("", encoding="utf-8")
+        os.replace(tmp_sentinel, sentinel)
+        return bin_dir
+
+
+def _reinstall_project(
+    repo_path: Path,
+    python_bin: Path,
+    log_path: Path,
+    *,
+    installer: Literal["uv", "pip"],
+) -> None:
+    """Reinstall the checked-out project into a reused environment without deps."""
+    if not (repo_path / "pyproject.toml").exists():
+        return
+    flag = "--reinstall" if installer == "uv" else "--force-reinstall"
+    _pip_install(log_path, python_bin, ["--no-deps", flag, "."], installer=installer, cwd=repo_path)
 
-    if manager == "uv":
-        return _prepare_uv_environment(env_dir, repo_path, log_path)
-    if manager == "pyenv":
-        return _prepare_pyenv_environment(env_dir, repo_path, log_path)
-    raise RuntimeError(f"Unsupported environment manager: {manager}")
 
+def _prune_stale_environments(envs_root: Path) -> None:
+    """Delete cached environments that have not been used for a while."""
+    cutoff = time.time() - ENV_CACHE_MAX_AGE_SECONDS
+    for candidate in envs_root.iterdir():
+        sentinel = candidate / ENV_READY_SENTINEL
+        try:
+            last_used = sentinel.stat().st_mtime
+        except OSError:
+            continue
+        if last_used < cutoff:
+            logger.debug("Removing stale environment %s", candidate)
+            _fast_rmtree(candidate, ignore_errors=True)
 
-def _prepare_uv_environment(env_dir: Path, repo_path: Path, log_path: Path) -> Path:
+
+def _prepare_uv_environment(
+    env_dir: Path,
+    repo_path: Path,
+    log_path: Path,
+    pyproject_data: dict[str, Any],
+) -> Path:
     """Create and populate an environment using uv for venv + installers."""
 
     logger.debug("Creating uv virtualenv at %s", env_dir)
     _run_command(["uv", "venv", str(env_dir)], log_path)
-    bin_dir = env_dir / ("Scripts" if os.name == "nt" else "bin")
-    python_bin = bin_dir / ("python.exe" if os.name == "nt" else "python")
+    bin_dir = env_dir / _BIN_DIR_NAME
+    python_bin = bin_dir / _PYTHON_EXE
 
-    _pip_install(log_path, python_bin, ["sphinx"], installer="uv")
-    _install_repo_dependencies(repo_path, python_bin, log_path, installer="uv")
+    if not _sync_locked_dependencies(env_dir, repo_path, python_bin, log_path, pyproject_data):
+        _install_repo_dependencies(repo_path, python_bin, log_path, pyproject_data, installer="uv")
     return bin_dir
 
 
-def _prepare_pyenv_environment(env_dir: Path, repo_path: Path, log_path: Path) -> Path:
+def _sync_locked_dependencies(
+    env_dir: Path,
+    repo_path: Path,
+    python_bin: Path,
+    log_path: Path,
+    pyproject_data: dict[str, Any],
+) -> bool:
+    """Install pinned dependencies from ``uv.lock`` or ``requirements.lock``.
+
+    Lockfiles are installed as-is so no resolution happens; Sphinx is added
+    afterwards in case the lock does not pin it.
+
+    :param env_dir: Virtualenv to populate.
+    :param repo_path: Repository checkout location.
+    :param python_bin: Python interpreter inside the environment.
+    :param log_path: Build log path for recording installer output.
+    :param pyproject_data: Parsed ``pyproject.toml`` (empty when absent).
+    :returns: ``True`` when a lockfile was found and installed.
+    """
+    if (repo_path / "uv.lock").exists():
+        cmd = ["uv", "sync", "--frozen", "--no-editable", "--python", str(python_bin)]
+        for extra in _detect_optional_extras(pyproject_data):
+            cmd.extend(["--extra", extra])
+        env = os.environ.copy()
+        env["UV_PROJECT_ENVIRONMENT"] = str(env_dir)
+        logger.debug("Syncing %s from uv.lock", repo_path)
+        _run_command(cmd, log_path, cwd=repo_path, env=env)
+    elif (repo_path / "requirements.lock").exists():
+        logger.debug("Syncing %s from requirements.lock", repo_path)
+        _run_command(
+            ["uv", "pip", "sync", "--python", str(python_bin), str(repo_path / "requirements.lock")],
+            log_path,
+            cwd=repo_path,
+        )
+        if (repo_path / "pyproject.toml").exists():
+            _pip_install(log_path, python_bin, ["--no-deps", "."], installer="uv", cwd=repo_path)
+    else:
+        return False
+    _pip_install(log_path, python_bin, ["sphinx"], installer="uv")
+    return True
+
+
+def _prepare_pyenv_environment(
+    env_dir: Path,
+    repo_path: Path,
+    log_path: Path,
+    pyproject_data: dict[str, Any],
+) -> Path:
     """Create an environment using pyenv for Python selection and pip installs."""
 
-    python_version = _resolve_pyenv_python_version(repo_path)
+    python_version = _resolve_pyenv_python_version(repo_path, pyproject_data)
     logger.debug("Ensuring pyenv Python %s is available", python_version)
     _run_command(["pyenv", "install", "-s", python_version], log_path)
 
@@ -269,11 +641,10 @@ def _prepare_pyenv_environment(env_dir: Path, repo_path: Path, log_path: Path) -
     logger.debug("Creating pyenv virtualenv at %s", env_dir)
     _run_command(["pyenv", "exec", "python", "-m", "venv", str(env_dir)], log_path, env=env)
 
-    bin_dir = env_dir / ("Scripts" if os.name == "nt" else "bin")
-    python_bin = bin_dir / ("python.exe" if os.name == "nt" else "python")
+    bin_dir = env_dir / _BIN_DIR_NAME
+    python_bin = bin_dir / _PYTHON_EXE
 
-    _pip_install(log_path, python_bin, ["sphinx"], installer="pip")
-    _install_repo_dependencies(repo_path, python_bin, log_path, installer="pip")
+    _install_repo_dependencies(repo_path, python_bin, log_path, pyproject_data, installer="pip")
     return bin_dir
 
 
@@ -281,28 +652,32 @@ def _install_repo_dependencies(
     repo_path: Path,
     python_bin: Path,
     log_path: Path,
+    pyproject_data: dict[str, Any],
     *,
     installer: Literal["uv", "pip"],
 ) -> None:
-    """Install optional extras plus common requirements files for the repo.
+    """Install Sphinx, optional extras and common requirements files for the repo.
+
+    Everything is passed to a single installer invocation so dependencies are
+    resolved once.
 
     :param repo_path: Repository checkout location.
     :param python_bin: Python interpreter inside the temporary environment.
     :param log_path: Build log path for recording installer output.
+    :param pyproject_data: Parsed ``pyproject.toml`` (empty when absent).
     """
-    pyproject = repo_path / "pyproject.toml"
-    if pyproject.exists():
-        pyproject_data = _load_pyproject(pyproject)
+    args = ["sphinx"]
+    if (repo_path / "pyproject.toml").exists():
         extras = _detect_optional_extras(pyproject_data)
         spec = "."
         if extras:
             spec = f".[{','.join(extras)}]"
         logger.debug("Installing repo dependencies %s with extras %s", repo_path, extras)
-        _pip_install(log_path, python_bin, [spec], installer=installer, cwd=repo_path)
+        args.append(spec)
         group_requirements = _poetry_group_requirements(pyproject_data, repo_path)
         if group_requirements:
             logger.debug("Installing Poetry group dependencies: %s", group_requirements)
-            _pip_install(log_path, python_bin, group_requirements, installer=installer, cwd=repo_path)
+            args.extend(group_requirements)
 
     req_candidates = [
         repo_path / "requirements.txt",
@@ -312,7 +687,8 @@ def _install_repo_dependencies(
     for req in req_candidates:
         if req.exists():
             logger.debug("Installing requirements from %s", req)
-            _pip_install(log_path, python_bin, ["-r", str(req)], installer=installer)
+            args.extend(["-r", str(req)])
+    _pip_install(log_path, python_bin, args, installer=installer, cwd=repo_path)
 
 
 def _build_sphinx(docs_path: Path, output_dir: Path, log_path: Path, env_bin: Path) -> None:
@@ -328,10 +704,10 @@ def _build_sphinx(docs_path: Path, output_dir: Path, log_path: Path, env_bin: Pa
         raise FileNotFoundError(f"Docs path {docs_path} missing")
 
     if output_dir.exists():
-        shutil.rmtree(output_dir)
+        _fast_rmtree(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    sphinx_exe = env_bin / ("sphinx-build.exe" if os.name == "nt" else "sphinx-build")
+    sphinx_exe = env_bin / _SPHINX_BUILD_EXE
     logger.info("Running sphinx build for %s -> %s", docs_path, output_dir)
     cmd = [
         str(sphinx_exe),
@@ -373,18 +749,20 @@ def _run_command(
     :param log_path: File capturing the combined output.
     :param cwd: Optional working directory for the process.
     :param timeout: Optional timeout passed to :func:`subprocess.run`.
+    :param env: Optional environment; ``PYTHONUNBUFFERED`` is always set so
+        Python tools such as ``sphinx-build`` stream into the log live.
     :raises RuntimeError: If the command exits with a non-zero status.
     """
-    with log_path.open("a", encoding="utf-8") as log:
+    env = dict(os.environ if env is None else env)
+    env.setdefault("PYTHONUNBUFFERED", "1")
+    with open(log_path, "ab", buffering=0) as log:
         logger.debug("Running command: %s", " ".join(cmd))
-        log.write(f"\n$ {' '.join(cmd)} (cwd={cwd or os.getcwd()})\n")
-        log.flush()
+        log.write(f"\n$ {' '.join(cmd)} (cwd={cwd or os.getcwd()})\n".encode("utf-8"))
         proc = subprocess.run(
             cmd,
             cwd=str(cwd) if cwd else None,
             stdout=log,
             stderr=subprocess.STDOUT,
-            text=True,
             check=False,
             timeout=timeout,
             env=env,
@@ -394,10 +772,10 @@ def _run_command(
             raise RuntimeError(f"Command {' '.join(cmd)} failed with exit code {proc.returncode}")
 
 
-def _resolve_pyenv_python_version(repo_path: Path) -> str:
+def _resolve_pyenv_python_version(repo_path: Path, pyproject_data: dict[str, Any]) -> str:
     """Return the Python version to request from pyenv for this repo."""
 
-    pyproject_version = _python_version_from_pyproject(repo_path)
+    pyproject_version = _python_version_from_pyproject(pyproject_data)
     if pyproject_version:
         return pyproject_version
 
@@ -419,17 +797,14 @@ def _resolve_pyenv_python_version(repo_path: Path) -> str:
 def _load_pyproject(pyproject: Path) -> dict[str, Any]:
     """Parse the pyproject.toml file into a dictionary."""
     try:
-        return tomllib.loads(pyproject.read_text(encoding="utf-8"))
+        with pyproject.open("rb") as fp:
+            return tomllib.load(fp)
     except (OSError, tomllib.TOMLDecodeError):
         return {}
 
 
-def _python_version_from_pyproject(repo_path: Path) -> str | None:
-    """Extract the desired Python version from pyproject metadata if available."""
-    pyproject = repo_path / "pyproject.toml"
-    if not pyproject.exists():
-        return None
-    data = _load_pyproject(pyproject)
+def _python_version_from_pyproject(data: dict[str, Any]) -> str | None:
+    """Extract the desired Python version from parsed pyproject metadata if available."""
     project = data.get("project", {})
     requires_python = project.get("requires-python")
     version = _first_version_token(requires_python) if isinstance(requires_python, str) else None
@@ -572,7 +947,7 @@ def _translate_poetry_version(constraint: str) -> str:
         if not base:
             return ""
         return f"~={base}"
-    if any(spec.startswith(op) for op in (">", "<", "=", "!", "~")) or "," in spec:
+    if spec[:1] in _VERSION_OPERATOR_CHARS or "," in spec:
         return spec
     if spec[0].isdigit():
         return f"=={spec}"
@@ -582,13 +957,8 @@ def _translate_poetry_version(constraint: str) -> str:
 def _increment_caret_upper_bound(version: str) -> str:
     """Calculate the exclusive upper bound for a caret constraint."""
     def _parse_int(part: str) -> int:
-        digits = ""
-        for char in part:
-            if char.isdigit():
-                digits += char
-            else:
-                break
-        return int(digits) if digits else 0
+        match = _LEADING_INT_PATTERN.match(part)
+        return int(match.group()) if match else 0
 
     parts = [_parse_int(p) for p in version.split(".")]
     while len(parts) < 3:
@@ -631,40 +1001,60 @@ def _inject_navigation_links(
         "BUILD_DATE": build_date,
     }
     js_assignments = ";".join(
-        [f"window.__SPHINX_SERVER_{key}={json.dumps(value)}" for key, value in script_payload.items()]
+        f"window.__SPHINX_SERVER_{key}={json.dumps(value)}" for key, value in script_payload.items()
     )
-    script = (
-        f"<script>window.__SPHINX_SERVER_NAV=1;{js_assignments};</script>\n"
-        '<script defer src="/assets/sphinx-nav.js"></script>\n'
-    )
-    for html_file in artifact_dir.rglob("*.html"):
-        try:
-            contents = html_file.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            continue
-        if "__SPHINX_SERVER_NAV" in contents:
-            continue
-        lower = contents.lower()
-        marker = "</body>"
-        idx = lower.rfind(marker)
-        if idx == -1:
-            continue
-        contents = contents[:idx] + script + contents[idx:]
-        html_file.write_text(contents, encoding="utf-8")
+    script_bytes = _NAV_SCRIPT_PREFIX + js_assignments.encode("utf-8") + _NAV_SCRIPT_SUFFIX
+    html_files = list(artifact_dir.rglob("*.html"))
+    if not html_files:
+        return
+    inject = functools.partial(_inject_script, script_bytes=script_bytes)
+    workers = min(INJECT_MAX_WORKERS, (os.cpu_count() or 1) * 4, len(html_files))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nav-inject") as pool:
+        for _ in pool.map(inject, html_files, chunksize=16):
+            pass
 
 
-def _extract_project_metadata(repo_path: Path) -> dict[str, str]:
-    """Read project metadata from ``pyproject.toml`` when present.
+def _inject_script(html_file: Path, script_bytes: bytes) -> None:
+    """Insert ``script_bytes`` before the closing body tag of one page.
 
-    :param repo_path: Local repository checkout.
+    Only the end of the page is read and rewritten: the tag is searched for in
+    the last :data:`INJECT_TAIL_BYTES`, and the script plus the bytes after the
+    tag are written in place. Pages whose tag is not in that window are read
+    whole.
+    """
+    with html_file.open("r+b") as fh:
+        size = fh.seek(0, os.SEEK_END)
+        start = max(0, size - INJECT_TAIL_BYTES)
+        fh.seek(start)
+        tail = fh.read()
+        idx = _body_close_index(tail)
+        if start and (idx == -1 or idx < len(script_bytes)):
+            start = 0
+            fh.seek(0)
+            tail = fh.read()
+            idx = _body_close_index(tail)
+        if idx == -1 or NAV_MARKER in tail:
+            return
+        fh.seek(start + idx)
+        fh.write(script_bytes + tail[idx:])
+
+
+def _body_close_index(contents: bytes) -> int:
+    """Return the offset of the last closing body tag, or ``-1``."""
+    idx = contents.rfind(b"</body>")
+    if idx != -1:
+        return idx
+    matches = list(BODY_CLOSE_PATTERN.finditer(contents))
+    return matches[-1].start() if matches else -1
+
+
+def _extract_project_metadata(data: dict[str, Any]) -> dict[str, str]:
+    """Read project metadata from a parsed ``pyproject.toml``.
+
+    :param data: Parsed ``pyproject.toml`` (empty when absent or invalid).
     :returns: Mapping with ``name``, ``version``, ``summary``, and ``homepage`` keys.
     """
-    pyproject = repo_path / "pyproject.toml"
-    if not pyproject.exists():
-        return {}
-    try:
-        data = tomllib.loads(pyproject.read_text(encoding="utf-8"))
-    except (OSError, tomllib.TOMLDecodeError):
+    if not data:
         return {}
     project = data.get("project", {}) or {}
     urls = project.get("urls") or {}
@@ -700,19 +1090,22 @@ def _maybe_update_repo_metadata(
     session.add(repo)
 
 
-async def enqueue_target_build(
+def create_target_build(
     target_id: int,
     session: Session,
-    queue: BuildQueue,
     triggered_by: str = "manual",
+    force: bool = False,
 ) -> Build:
-    """Create a :class:`Build` row and enqueue it for processing.
+    """Add a queued :class:`Build` row for a target without committing.
+
+    The row is flushed so its primary key is available; the caller owns the
+    transaction and must enqueue the build only after committing.
 
     :param target_id: Identifier of the tracked target to build.
     :param session: Database session used to persist the build.
-    :param queue: Build queue instance to receive the job.
     :param triggered_by: Label describing how the build was triggered.
-    :returns: The persisted :class:`Build` instance.
+    :param force: Rebuild even when the resolved SHA is already published.
+    :returns: The flushed :class:`Build` instance.
     :raises ValueError: If the target does not exist.
     """
     target = session.get(TrackedTarget, target_id)
@@ -723,15 +1116,65 @@ async def enqueue_target_build(
         target_id=target.id,
         ref_name=target.ref_name,
         triggered_by=triggered_by,
+        force=force,
     )
     session.add(build)
+    session.flush()
+    return build
+
+
+async def enqueue_target_build(
+    target_id: int,
+    session: Session,
+    queue: BuildQueue,
+    triggered_by: str = "manual",
+    force: bool = False,
+) -> Build:
+    """Create a :class:`Build` row and enqueue it for processing.
+
+    The queue is checked before the row is created so a full queue never
+    leaves an orphaned ``queued`` build behind.
+
+    :param target_id: Identifier of the tracked target to build.
+    :param session: Database session used to persist the build.
+    :param queue: Build queue instance to receive the job.
+    :param triggered_by: Label describing how the build was triggered.
+    :param force: Rebuild even when the resolved SHA is already published.
+    :returns: The persisted :class:`Build` instance.
+    :raises ValueError: If the target does not exist.
+    :raises asyncio.QueueFull: If the build queue has no room.
+    """
+    if queue.full():
+        raise asyncio.QueueFull
+    build = create_target_build(target_id, session, triggered_by=triggered_by, force=force)
     session.commit()
     session.refresh(build)
     logger.info("Queued build %s for target %s (triggered_by=%s)", build.id, target_id, triggered_by)
-    await queue.enqueue(build.id)
+    queue.try_enqueue(build.id)
     return build
 
 
-def pending_builds(session: Session) -> list[Build]:
-    """Return builds ordered by creation time newest-first."""
-    return list(session.exec(select(Build).order_by(Build.created_at.desc())).all())
+def pending_builds(
+    session: Session,
+    limit: int = 50,
+    before: datetime | None = None,
+) -> list[Build]:
+    """Return one page of builds ordered by creation time newest-first.
+
+    The repository and target of each build are loaded eagerly for display.
+
+    :param session: Open SQLModel session.
+    :param limit: Maximum number of builds to return.
+    :param before: Keyset cursor; only builds created strictly earlier are
+        returned. Pass the ``created_at`` of the last build of a page to get
+        the next one.
+    """
+    stmt = (
+        select(Build)
+        .options(selectinload(Build.repository), selectinload(Build.target))
+        .order_by(Build.created_at.desc())
+        .limit(limit)
+    )
+    if before is not None:
+        stmt = stmt.where(Build.created_at < before)
+    return list(session.exec(stmt).all())
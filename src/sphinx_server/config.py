@@ -29,18 +29,25 @@ class Settings(BaseSettings):
     reload: bool = False
 
     data_dir: Path = Field(default_factory=lambda: Path.cwd() / ".sphinx_server")
-    repo_cache_subdir: str = "repos"  # legacy cache, no longer used for builds
+    repo_cache_subdir: str = "repos"  # bare mirrors shared by build worktrees
     build_subdir: str = "builds"
     log_subdir: str = "logs"
     env_subdir: str = "envs"
     workspace_subdir: str = "workspaces"
+    installer_cache_subdir: str = "installer-cache"
 
     database_url: str | None = None
 
     git_default_timeout: int = 120
+    git_retry_base_seconds: float = 2.0
+    git_retry_max_delay_seconds: float = 60.0
     sphinx_timeout: int = 600
     build_processes: int = 5
+    build_queue_maxsize: int = 100
     auto_build_interval_seconds: int = 60
+    auto_build_max_concurrency: int = 8
+    auto_build_max_backoff_seconds: int = 480
+    remote_sha_ttl_seconds: int = 30
     environment_manager: Literal["uv", "pyenv"] = "uv"
     pyenv_default_python_version: str = "3.11.8"
     secret_key: str = "change-me"
@@ -71,6 +78,10 @@ class Settings(BaseSettings):
     def workspace_root(self) -> Path:
         return self.data_dir / self.workspace_subdir
 
+    @property
+    def installer_cache_dir(self) -> Path:
+        return self.data_dir / self.installer_cache_subdir
+
     def ensure_dirs(self) -> None:
         """Create all filesystem directories required by the service."""
         for label, path in {
@@ -80,6 +91,7 @@ class Settings(BaseSettings):
             "logs": self.log_dir,
             "envs": self.env_root_dir,
             "workspaces": self.workspace_root,
+            "installer_cache": self.installer_cache_dir,
         }.items():
             path.mkdir(parents=True, exist_ok=True)
             logger.debug("Ensured %s directory exists at %s", label, path)
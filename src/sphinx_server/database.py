@@ -5,14 +5,62 @@ from __future__ import annotations
 import logging
 from contextlib import contextmanager
 
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(settings.db_url, connect_args={"check_same_thread": False})
+# Bump whenever _ensure_sqlite_columns learns about a new column (or the models
+# gain an index) so existing databases run the migration once more.
+SCHEMA_VERSION = 1
+
+SQLITE_PRAGMAS: tuple[str, ...] = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+SQLITE_BUSY_TIMEOUT_SECONDS = 30
+
+_is_sqlite = settings.db_url.startswith("sqlite")
+
+# SQLAlchemy keeps file-backed SQLite connections in a QueuePool, so requests
+# reuse open handles instead of reopening the database (and its WAL/SHM files).
+engine = create_engine(
+    settings.db_url,
+    connect_args=(
+        {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_SECONDS}
+        if _is_sqlite
+        else {}
+    ),
+)
+
+
+if _is_sqlite:
+
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+        """Use WAL journaling so readers never block the build workers' commits."""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+# Rows stay loaded after commit so templates and UI conversions do not issue a
+# reload query per attribute once the request has committed.
+SessionLocal = sessionmaker(
+    bind=engine,
+    class_=Session,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 
 def init_db() -> None:
@@ -25,7 +73,7 @@ def init_db() -> None:
 @contextmanager
 def session_scope():
     """Context manager yielding a short-lived session."""
-    session = Session(engine)
+    session = SessionLocal()
     try:
         yield session
     finally:
@@ -34,66 +82,66 @@ def session_scope():
 
 def get_session():
     """FastAPI dependency hook yielding a new session."""
-    with Session(engine) as session:
+    with SessionLocal() as session:
         yield session
 
 
 def _ensure_sqlite_columns() -> None:
-    """Add missing optional columns when using SQLite."""
-    if not settings.db_url.startswith("sqlite"):
+    """Add missing optional columns and indexes when using SQLite.
+
+    The work is skipped once the database's ``user_version`` reaches
+    :data:`SCHEMA_VERSION`; otherwise all introspection, ``ALTER TABLE`` and
+    ``CREATE INDEX`` statements run inside a single transaction. New databases
+    get their indexes from ``create_all``.
+    """
+    if not _is_sqlite:
         return
-    repo_columns = {
-        "project_name": "TEXT",
-        "project_version": "TEXT",
-        "project_summary": "TEXT",
-        "project_homepage": "TEXT",
-        "primary_target_id": "INTEGER",
-        "deploy_key": "TEXT",
-        "public_docs": "BOOLEAN DEFAULT 0",
+    table_columns = {
+        "repository": {
+            "project_name": "TEXT",
+            "project_version": "TEXT",
+            "project_summary": "TEXT",
+            "project_homepage": "TEXT",
+            "primary_target_id": "INTEGER",
+            "deploy_key": "TEXT",
+            "public_docs": "BOOLEAN DEFAULT 0",
+        },
+        "build": {
+            "duration_seconds": "REAL",
+            "triggered_by": "TEXT DEFAULT 'manual'",
+            "is_active": "BOOLEAN DEFAULT 0",
+            "force": "BOOLEAN DEFAULT 0",
+        },
+        "trackedtarget": {
+            "environment_manager": "TEXT",
+        },
+        "user": {
+            "must_change_password": "BOOLEAN DEFAULT 0",
+        },
     }
-    build_columns = {
-        "duration_seconds": "REAL",
-        "triggered_by": "TEXT DEFAULT 'manual'",
-    }
-    tracked_target_columns = {
-        "environment_manager": "TEXT",
-    }
-    user_columns = {
-        "must_change_password": "BOOLEAN DEFAULT 0",
-    }
-    with engine.connect() as conn:
-        repo_existing = {
-            row[1]
-            for row in conn.exec_driver_sql("PRAGMA table_info(repository)")
-        }
-        for col, ddl in repo_columns.items():
-            if col not in repo_existing:
-                logger.debug("Adding repo column %s", col)
-                conn.exec_driver_sql(f"ALTER TABLE repository ADD COLUMN {col} {ddl}")
-
-        build_existing = {
-            row[1]
-            for row in conn.exec_driver_sql("PRAGMA table_info(build)")
-        }
-        for col, ddl in build_columns.items():
-            if col not in build_existing:
-                logger.debug("Adding build column %s", col)
-                conn.exec_driver_sql(f"ALTER TABLE build ADD COLUMN {col} {ddl}")
-
-        target_existing = {
-            row[1]
-            for row in conn.exec_driver_sql("PRAGMA table_info(trackedtarget)")
-        }
-        for col, ddl in tracked_target_columns.items():
-            if col not in target_existing:
-                logger.debug("Adding trackedtarget column %s", col)
-                conn.exec_driver_sql(f"ALTER TABLE trackedtarget ADD COLUMN {col} {ddl}")
-
-        user_existing = {
-            row[1]
-            for row in conn.exec_driver_sql("PRAGMA table_info(user)")
+    with engine.begin() as conn:
+        current_version = conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+        if current_version >= SCHEMA_VERSION:
+            logger.debug("SQLite schema already at version %s", current_version)
+            return
+        # pysqlite does not open a transaction for DDL by itself; without this
+        # every ALTER would be committed (and synced) on its own.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        existing = {
+            table: {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+            for table in table_columns
         }
-        for col, ddl in user_columns.items():
-            if col not in user_existing:
-                logger.debug("Adding user column %s", col)
-                conn.exec_driver_sql(f"ALTER TABLE user ADD COLUMN {col} {ddl}")
+        for table, columns in table_columns.items():
+            for col, ddl in columns.items():
+                if col not in existing[table]:
+                    logger.debug("Adding %s column %s", table, col)
+                    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {col} {ddl}")
+        if "is_active" not in existing["build"]:
+            logger.debug("Backfilling build.is_active")
+            conn.exec_driver_sql(
+                "UPDATE build SET is_active = (status IN ('queued', 'running'))"
+            )
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
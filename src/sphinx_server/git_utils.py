@@ -3,22 +3,74 @@
 
 from __future__ import annotations
 
+import atexit
+import base64
+import hashlib
 import logging
 import os
+import random
+import re
+import shlex
 import subprocess
-import uuid
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Iterable
+from typing import BinaryIO, ContextManager, Iterable, Iterator
 from urllib.parse import urlsplit, urlunsplit
 
+import httpx
+
 from .config import settings
 from .models import RefType
 
 logger = logging.getLogger(__name__)
+_OBJECT_ID_PATTERN = re.compile(rb"[0-9a-f]{40}|[0-9a-f]{64}")
+COMMIT_SHA_PATTERN = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+GIT_ERROR_TAIL_BYTES = 4096
+SSH_KEY_TMPFS_DIR = Path("/dev/shm")
+_SSH_KEY_FILES: dict[str, Path] = {}
+_SSH_KEY_FILES_LOCK = threading.Lock()
+# Failures that another attempt cannot fix (bad credentials, missing repo/ref).
+_PERMANENT_GIT_ERROR_PATTERN = re.compile(
+    r"authentication failed|permission denied|repository .*not found|"
+    r"remote branch .* not found|could not find remote branch|"
+    r"invalid username or password|terminal prompts disabled",
+    re.IGNORECASE,
+)
+
+# One full ``git ls-remote`` per repository serves both the ref autocomplete and
+# every SHA probe for that repository until it expires.
+_REMOTE_REFS_CACHE: dict[tuple[str, str], tuple[float, dict[str, str]]] = {}
+_REMOTE_REFS_LOCKS: dict[tuple[str, str], threading.Lock] = {}
+_REMOTE_REFS_LOCKS_GUARD = threading.Lock()
+_HTTP_CLIENT: httpx.Client | None = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+_LS_REFS_V2_HEADERS = {
+    "Git-Protocol": "version=2",
+    "Content-Type": "application/x-git-upload-pack-request",
+    "Accept": "application/x-git-upload-pack-result",
+}
 
 
 class GitError(RuntimeError):
-    """Error raised when an underlying git command fails."""
+    """Error raised when an underlying git command fails.
+
+    :ivar returncode: Exit status of the git process, when one ran.
+    :ivar output: Tail of the command output, when it was captured.
+    """
+
+    def __init__(self, message: str, returncode: int | None = None, output: str = "") -> None:
+        """Store the exit status and output alongside the message."""
+        super().__init__(message)
+        self.returncode = returncode
+        self.output = output
+
+    @property
+    def is_permanent(self) -> bool:
+        """Whether retrying the same command cannot succeed."""
+        return bool(_PERMANENT_GIT_ERROR_PATTERN.search(self.output or str(self)))
 
 
 def inject_token(url: str, token: str | None) -> str:
@@ -42,7 +94,7 @@ def inject_token(url: str, token: str | None) -> str:
 def run_git(
     args: Iterable[str],
     cwd: Path | None,
-    log_file: Path,
+    log_file: Path | BinaryIO,
     timeout: int | None = None,
     env: dict[str, str] | None = None,
 ) -> None:
@@ -50,28 +102,61 @@ def run_git(
 
     :param args: Git arguments (without the ``git`` prefix).
     :param cwd: Working directory where the command executes.
-    :param log_file: File for appending stdout/stderr.
+    :param log_file: File (or unbuffered binary handle opened in append mode)
+        for appending stdout/stderr.
     :param timeout: Optional timeout passed to :func:`subprocess.run`.
     :param env: Optional environment overrides, e.g., SSH command.
     """
     cmd = ["git", *args]
-    with log_file.open("a", encoding="utf-8") as log:
+    with _log_handle(log_file) as log:
         logger.debug("Executing git %s (cwd=%s)", " ".join(args), cwd or os.getcwd())
-        log.write(f"\n$ {' '.join(cmd)}\n")
-        log.flush()
+        log.write(f"\n$ {' '.join(cmd)}\n".encode("utf-8"))
+        output_start = log.tell()
         proc = subprocess.run(
             cmd,
             cwd=str(cwd) if cwd else None,
             stdout=log,
             stderr=subprocess.STDOUT,
             check=False,
-            text=True,
             timeout=timeout or settings.git_default_timeout,
             env=env,
         )
         if proc.returncode != 0:
             logger.error("git %s failed with %s", " ".join(args), proc.returncode)
-            raise GitError(f"git {' '.join(args)} failed with code {proc.returncode}")
+            raise GitError(
+                f"git {' '.join(args)} failed with code {proc.returncode}",
+                returncode=proc.returncode,
+                output=_read_log_tail(Path(log.name), output_start),
+            )
+
+
+@contextmanager
+def _open_git_log(log_file: Path) -> Iterator[BinaryIO]:
+    """Open ``log_file`` once for a sequence of :func:`run_git` calls.
+
+    The handle is unbuffered: git writes to the same file descriptor, so our
+    own lines must hit the file before the child process starts.
+    """
+    with open(log_file, "ab", buffering=0) as log:
+        yield log
+
+
+def _log_handle(log_file: Path | BinaryIO) -> ContextManager[BinaryIO]:
+    """Return a context yielding a log handle, opening ``log_file`` if it is a path."""
+    if isinstance(log_file, (str, os.PathLike)):
+        return _open_git_log(Path(log_file))
+    return nullcontext(log_file)
+
+
+def _read_log_tail(log_file: Path, start: int) -> str:
+    """Return up to :data:`GIT_ERROR_TAIL_BYTES` of output written after ``start``."""
+    try:
+        with open(log_file, "rb") as log:
+            end = log.seek(0, os.SEEK_END)
+            log.seek(max(start, end - GIT_ERROR_TAIL_BYTES))
+            return log.read().decode("utf-8", "replace")
+    except OSError:
+        return ""
 
 
 def clone_or_fetch(
@@ -82,89 +167,194 @@ def clone_or_fetch(
     timeout: int | None = None,
     retries: int = 2,
     deploy_key: str | None = None,
-    ssh_workdir: Path | None = None,
+    ref_name: str | None = None,
+    *,
+    mirror_dir: Path,
+    ref_type: RefType | str | None = None,
 ) -> None:
-    """Clone a repository (with retries) or fetch updates if it already exists.
+    """Update a repository mirror (with retries) and check a ref out of it.
+
+    A bare mirror of every branch and tag is kept in ``mirror_dir`` and
+    updated incrementally; ``checkout_dir`` then becomes a detached worktree
+    of the mirror at ``ref_name``. Callers must serialize access to a given
+    mirror.
 
     :param repo_url: Remote repository URL.
     :param token: HTTP token to inject for private clones.
-    :param checkout_dir: Destination directory for the git clone.
+    :param checkout_dir: Destination directory for the worktree.
     :param log_file: Log capturing command output.
     :param timeout: Optional timeout for git commands.
-    :param retries: Number of clone retries before re-raising.
+    :param retries: Number of fetch retries before re-raising; attempts are
+        spaced with exponential backoff and jitter, and permanent failures
+        (authentication, missing repository or ref) are not retried.
     :param deploy_key: SSH private key contents for private repos.
-    :param ssh_workdir: Directory to write temporary SSH keys into.
+    :param ref_name: Branch, tag or commit to check out; ``None`` uses ``HEAD``.
+    :param mirror_dir: Bare mirror shared by every checkout of the repository.
+    :param ref_type: :class:`RefType` of ``ref_name``, used to resolve it
+        unambiguously inside the mirror.
     """
     checkout_dir.parent.mkdir(parents=True, exist_ok=True)
-    if checkout_dir.exists():
-        logger.debug("Fetching updates for repo at %s", checkout_dir)
-        run_git(["fetch", "--all", "--tags", "--prune"], cwd=checkout_dir, log_file=log_file)
-        return
+    with _log_handle(log_file) as log:
+        _update_mirror(repo_url, token, mirror_dir, log, timeout, retries, deploy_key)
+        _add_mirror_worktree(mirror_dir, checkout_dir, log, ref_name, ref_type)
+
 
-    temp_url = inject_token(repo_url, token)
-    env = None
-    key_path: Path | None = None
-    env, key_path = _prepare_ssh_env(deploy_key, ssh_workdir)
+def _update_mirror(
+    repo_url: str,
+    token: str | None,
+    mirror_dir: Path,
+    log: BinaryIO,
+    timeout: int | None,
+    retries: int,
+    deploy_key: str | None,
+) -> None:
+    """Create the bare mirror if needed and fetch every branch and tag into it.
 
+    The URL is passed on the command line rather than stored in the mirror's
+    configuration; the token travels in the environment (see :func:`_git_env`).
+    """
+    if not (mirror_dir / "HEAD").exists():
+        logger.info("Creating bare mirror of %s at %s", repo_url, mirror_dir)
+        mirror_dir.parent.mkdir(parents=True, exist_ok=True)
+        run_git(["init", "--bare", "--quiet", str(mirror_dir)], cwd=None, log_file=log)
+    _run_git_with_retries(
+        [
+            "--git-dir",
+            str(mirror_dir),
+            "fetch",
+            "--prune",
+            repo_url,
+            "+refs/heads/*:refs/heads/*",
+            "+refs/tags/*:refs/tags/*",
+        ],
+        log,
+        timeout=timeout,
+        env=_git_env(repo_url, token, deploy_key),
+        retries=retries,
+        description=f"fetch of {repo_url}",
+    )
+    logger.info("Updated mirror of %s at %s", repo_url, mirror_dir)
+
+
+def _add_mirror_worktree(
+    mirror_dir: Path,
+    checkout_dir: Path,
+    log: BinaryIO,
+    ref_name: str | None,
+    ref_type: RefType | str | None,
+) -> None:
+    """Check ``ref_name`` out of the mirror into a detached worktree."""
+    if not ref_name:
+        revision = "HEAD"
+    elif COMMIT_SHA_PATTERN.fullmatch(ref_name) or ref_type is None:
+        revision = ref_name
+    else:
+        revision = _remote_refspec(ref_type, ref_name)
+    git_dir = ["--git-dir", str(mirror_dir)]
+    # Finished build workspaces are discarded without "worktree remove".
+    run_git([*git_dir, "worktree", "prune"], cwd=None, log_file=log)
+    run_git(
+        [*git_dir, "worktree", "add", "--detach", "--force", str(checkout_dir), f"{revision}^{{commit}}"],
+        cwd=None,
+        log_file=log,
+    )
+
+
+def _run_git_with_retries(
+    args: list[str],
+    log: BinaryIO,
+    *,
+    timeout: int | None,
+    env: dict[str, str] | None,
+    retries: int,
+    description: str,
+) -> None:
+    """Run a network git command, retrying transient failures with backoff."""
     attempt = 0
     while True:
         try:
-            run_git(
-                ["clone", "-v", temp_url, str(checkout_dir)],
-                cwd=None,
-                log_file=log_file,
-                timeout=timeout,
-                env=env,
-            )
-            logger.info("Cloned repository %s into %s", repo_url, checkout_dir)
-            break
+            run_git(args, cwd=None, log_file=log, timeout=timeout, env=env)
+            return
         except GitError as exc:
             attempt += 1
-            if attempt > retries:
-                if key_path and key_path.exists():
-                    key_path.unlink()
+            if attempt > retries or exc.is_permanent:
                 raise
-            with log_file.open("a", encoding="utf-8") as log:
-                log.write(f"Retrying clone ({attempt}/{retries}) after error: {exc}\n")
-            logger.warning("Retrying clone of %s (%s/%s)", repo_url, attempt, retries)
-    _cleanup_ssh_key(key_path)
-    if token:
-        logger.debug("Resetting remote URL to %s", repo_url)
-        run_git(["remote", "set-url", "origin", repo_url], cwd=checkout_dir, log_file=log_file)
+            delay = _retry_delay(attempt)
+            log.write(f"Retrying {description} ({attempt}/{retries}) in {delay:.1f}s after error: {exc}\n".encode("utf-8"))
+            logger.warning("Retrying %s (%s/%s) in %.1fs", description, attempt, retries, delay)
+            time.sleep(delay)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Return the jittered exponential backoff before retry number ``attempt``."""
+    delay = settings.git_retry_base_seconds * (2 ** (attempt - 1)) * (0.5 + random.random())
+    return min(delay, settings.git_retry_max_delay_seconds)
 
 
-def list_remote_refs(repo_url: str, token: str | None, ref_type: str) -> list[str]:
+def read_head_sha(repo_path: Path) -> str | None:
+    """Resolve ``HEAD`` of a local checkout by reading ``.git`` files directly.
+
+    Handles detached heads (including detached worktrees), loose refs and
+    ``packed-refs``; returns ``None`` for anything else (reftable, ...) so
+    callers can fall back to ``git rev-parse``.
+
+    :param repo_path: Local checkout path.
+    :returns: Commit SHA or ``None`` when it cannot be resolved cheaply.
+    """
+    git_dir = repo_path / ".git"
+    if git_dir.is_file():
+        # Worktrees point at their private git directory through a ``.git`` file.
+        try:
+            pointer = git_dir.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if not pointer.startswith("gitdir: "):
+            return None
+        git_dir = (repo_path / pointer[8:].strip()).resolve()
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if COMMIT_SHA_PATTERN.fullmatch(head):
+        return head
+    if not head.startswith("ref: "):
+        return None
+    ref = head[5:].strip()
+    try:
+        value = (git_dir / ref).read_text(encoding="utf-8").strip()
+    except OSError:
+        value = None
+    if value is not None:
+        return value if COMMIT_SHA_PATTERN.fullmatch(value) else None
+    try:
+        packed = (git_dir / "packed-refs").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    for line in packed.splitlines():
+        sha, _, name = line.partition(" ")
+        if name == ref and COMMIT_SHA_PATTERN.fullmatch(sha):
+            return sha
+    return None
+
+
+def list_remote_refs(
+    repo_url: str,
+    token: str | None,
+    ref_type: str,
+    deploy_key: str | None = None,
+) -> list[str]:
     """List branches or tags from a remote repository.
 
     :param repo_url: Repository URI.
     :param token: Optional HTTP token to inject.
     :param ref_type: ``\"branch\"`` or ``\"tag\"`` to filter refs.
+    :param deploy_key: Optional SSH deploy key contents.
     :returns: Sorted unique list of ref names.
     :raises GitError: On ``git ls-remote`` failure.
     """
-    flag = "--heads" if ref_type == "branch" else "--tags"
-    temp_dir = settings.data_dir / "tmp"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    log_file = temp_dir / "git-ls.log"
-    cmd = ["git", "ls-remote", flag, inject_token(repo_url, token)]
-    with log_file.open("a", encoding="utf-8") as log:
-        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=False)
-        if proc.returncode != 0:
-            log.write(proc.stdout)
-            logger.error("git ls-remote failed for %s", repo_url)
-            raise GitError(f"git ls-remote failed: {proc.stdout.strip()}")
-    refs = []
-    for line in proc.stdout.splitlines():
-        if "\t" not in line:
-            continue
-        _, ref = line.split("\t", 1)
-        if ref.startswith("refs/heads/"):
-            refs.append(ref.replace("refs/heads/", ""))
-        elif ref.startswith("refs/tags/"):
-            refs.append(ref.replace("refs/tags/", ""))
-        else:
-            refs.append(ref)
-    return sorted(set(refs))
+    prefix = "refs/heads/" if ref_type == "branch" else "refs/tags/"
+    refs = _resolve_remote(repo_url, token, deploy_key)
+    return sorted({ref[len(prefix):] for ref in refs if ref.startswith(prefix)})
 
 
 def get_remote_sha(
@@ -173,6 +363,7 @@ def get_remote_sha(
     ref_type: RefType | str,
     ref_name: str,
     deploy_key: str | None = None,
+    max_age: float | None = None,
 ) -> str | None:
     """Return the SHA of a remote ref without cloning an entire repository.
 
@@ -181,63 +372,333 @@ def get_remote_sha(
     :param ref_type: :class:`RefType` enum or raw string.
     :param ref_name: Branch or tag name.
     :param deploy_key: Optional SSH deploy key contents.
+    :param max_age: Oldest cached listing (seconds) to accept; ``0`` forces a
+        fresh ``git ls-remote``. Defaults to ``remote_sha_ttl_seconds``.
     :returns: SHA string or ``None`` if the ref does not exist.
     :raises GitError: When ``git ls-remote`` exits with an error.
     """
-    ref_type_str = ref_type.value if hasattr(ref_type, "value") else ref_type
-    if ref_type_str == "branch":
-        refspec = f"refs/heads/{ref_name}"
-    else:
-        refspec = f"refs/tags/{ref_name}"
-    env, key_path = _prepare_ssh_env(deploy_key, None)
+    refs = _resolve_remote(repo_url, token, deploy_key, max_age=max_age)
+    return refs.get(_remote_refspec(ref_type, ref_name))
+
+
+def _resolve_remote(
+    repo_url: str,
+    token: str | None,
+    deploy_key: str | None = None,
+    max_age: float | None = None,
+) -> dict[str, str]:
+    """Return ``{ref: sha}`` for every branch and tag of a remote repository.
+
+    Listings are cached per repository and credentials for ``max_age``
+    seconds; concurrent callers for the same repository share one
+    ``git ls-remote``.
+
+    :raises GitError: When ``git ls-remote`` exits with an error.
+    """
+    if max_age is None:
+        max_age = settings.remote_sha_ttl_seconds
+    key = _remote_cache_key(repo_url, token, deploy_key)
+    with _REMOTE_REFS_LOCKS_GUARD:
+        lock = _REMOTE_REFS_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        cached = _REMOTE_REFS_CACHE.get(key)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        refs = _ls_remote(repo_url, token, deploy_key)
+        _REMOTE_REFS_CACHE[key] = (time.monotonic(), refs)
+        return refs
+
+
+def prune_remote_refs_cache(remotes: Iterable[tuple[str, str | None, str | None]]) -> None:
+    """Forget cached ref listings that are expired or not in ``remotes``.
+
+    :param remotes: ``(repo_url, token, deploy_key)`` of the repositories still
+        being watched; idle per-repository locks of evicted entries are dropped.
+    """
+    keep = {_remote_cache_key(*remote) for remote in remotes}
+    now = time.monotonic()
+    with _REMOTE_REFS_LOCKS_GUARD:
+        for key, (fetched_at, _refs) in list(_REMOTE_REFS_CACHE.items()):
+            if key not in keep or now - fetched_at >= settings.remote_sha_ttl_seconds:
+                del _REMOTE_REFS_CACHE[key]
+        for key, lock in list(_REMOTE_REFS_LOCKS.items()):
+            if key not in _REMOTE_REFS_CACHE and not lock.locked():
+                del _REMOTE_REFS_LOCKS[key]
+
+
+def _remote_cache_key(repo_url: str, token: str | None, deploy_key: str | None) -> tuple[str, str]:
+    """Key ref listings by repository and a digest of the credentials used."""
+    credentials = hashlib.sha256(f"{token or ''}\0{deploy_key or ''}".encode("utf-8")).hexdigest()
+    return repo_url, credentials
+
+
+def _ls_remote(repo_url: str, token: str | None, deploy_key: str | None) -> dict[str, str]:
+    """List all branches and tags of a remote repository.
+
+    HTTP(S) remotes without a deploy key are queried in-process over smart
+    HTTP; SSH remotes, deploy-key repositories and HTTP failures fall back to
+    a ``git ls-remote`` subprocess.
+    """
+    if not deploy_key and repo_url.startswith(("http://", "https://")):
+        try:
+            return _http_ls_remote(repo_url, token)
+        except GitError as exc:
+            logger.debug("HTTP ref listing failed for %s, using git ls-remote: %s", repo_url, exc)
+    cmd = ["git", "ls-remote", "--heads", "--tags", "--refs", repo_url]
+    proc = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+        env=_git_env(repo_url, token, deploy_key),
+        timeout=settings.git_default_timeout,
+    )
+    if proc.returncode != 0:
+        logger.error("git ls-remote failed for %s", repo_url)
+        raise GitError(f"git ls-remote failed: {proc.stderr.strip()}")
+    refs: dict[str, str] = {}
+    for line in proc.stdout.splitlines():
+        sha, _, ref = line.strip().partition("\t")
+        if ref:
+            refs[ref] = sha
+    return refs
+
+
+def _http_ls_remote(repo_url: str, token: str | None) -> dict[str, str]:
+    """List branches and tags over smart HTTP with the shared blocking client.
+
+    A protocol v2 ``ls-refs`` request scoped to heads and tags is tried first;
+    servers that reject it or answer with anything but a v2 listing fall back
+    to the full ``info/refs`` advertisement.
+
+    :raises GitError: When the endpoint fails or does not speak smart HTTP.
+    """
+    client = _get_http_client()
+    auth = _http_auth(repo_url, token)
+    base_url = repo_url.rstrip("/")
     try:
-        cmd = ["git", "ls-remote", inject_token(repo_url, token), refspec]
-        proc = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False,
-            env=env,
-            timeout=settings.git_default_timeout,
+        refs = _http_ls_refs_v2(client, base_url, auth)
+    except GitError as exc:
+        logger.debug("Protocol v2 ls-refs unavailable for %s: %s", repo_url, exc)
+        try:
+            response = client.get(
+                f"{base_url}/info/refs",
+                params={"service": "git-upload-pack"},
+                auth=auth,
+            )
+        except httpx.HTTPError as exc:
+            raise GitError(f"HTTP ref advertisement failed: {exc.__class__.__name__}") from exc
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "git-upload-pack-advertisement" not in content_type:
+            raise GitError(f"HTTP ref advertisement unavailable (status {response.status_code})")
+        refs = list(_parse_pkt_refs(response.content))
+    return {
+        ref: sha
+        for sha, ref in refs
+        if ref.startswith(("refs/heads/", "refs/tags/")) and not ref.endswith("^{}")
+    }
+
+
+def _http_ls_refs_v2(client: httpx.Client, base_url: str, auth: httpx.Auth | None) -> list[tuple[str, str]]:
+    """Issue a protocol v2 ``ls-refs`` request limited to heads and tags.
+
+    :raises GitError: When the server rejects or does not understand protocol v2,
+        or returns no refs at all (the caller then asks ``info/refs``).
+    """
+    try:
+        response = client.post(
+            f"{base_url}/git-upload-pack",
+            content=_ls_refs_v2_body("refs/heads/", "refs/tags/"),
+            auth=auth,
+            headers=_LS_REFS_V2_HEADERS,
         )
-        if proc.returncode != 0:
-            logger.error("git ls-remote failed for %s %s", repo_url, refspec)
-            raise GitError(proc.stderr.strip() or "git ls-remote failed")
-        for line in proc.stdout.splitlines():
-            parts = line.strip().split()
-            if len(parts) == 2 and parts[1] == refspec:
-                return parts[0]
-        return None
-    finally:
-        _cleanup_ssh_key(key_path)
+    except httpx.HTTPError as exc:
+        raise GitError(f"ls-refs request failed: {exc.__class__.__name__}") from exc
+    content_type = response.headers.get("content-type", "")
+    if response.status_code != 200 or "git-upload-pack-result" not in content_type:
+        raise GitError(f"ls-refs unavailable (status {response.status_code})")
+    return _parse_ls_refs_v2(response.content)
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the process-wide blocking HTTP client used for ref listings."""
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = httpx.Client(timeout=settings.git_default_timeout, follow_redirects=True)
+            atexit.register(_HTTP_CLIENT.close)
+        return _HTTP_CLIENT
+
+
+def _http_auth(repo_url: str, token: str | None) -> httpx.Auth | None:
+    """Send the token as the basic-auth user name unless the URL carries credentials."""
+    return httpx.BasicAuth(token, "") if token and not urlsplit(repo_url).username else None
+
+
+def _parse_ls_refs_v2(payload: bytes) -> list[tuple[str, str]]:
+    """Parse a protocol v2 ``ls-refs`` answer, rejecting anything else.
+
+    Servers that ignore ``Git-Protocol: version=2`` may still answer with an
+    upload-pack content type but an empty or v0 body; those (and answers
+    without any ref) raise so the ``info/refs`` advertisement is consulted.
+
+    :raises GitError: When ``payload`` is not a non-empty v2 ref listing.
+    """
+    if not payload.endswith(b"0000") or b"\0" in payload or payload.startswith(b"001e# service="):
+        raise GitError("Response is not a protocol v2 ls-refs answer")
+    refs = list(_parse_pkt_refs(payload))
+    if not refs:
+        raise GitError("ls-refs returned no refs")
+    return refs
+
+
+def _ls_refs_v2_body(*prefixes: str) -> bytes:
+    """Build a protocol v2 ``ls-refs`` request limited to ``prefixes``."""
+    return b"".join(
+        (
+            _pkt_line("command=ls-refs\n"),
+            b"0001",
+            *(_pkt_line(f"ref-prefix {prefix}\n") for prefix in prefixes),
+            b"0000",
+        )
+    )
+
+
+def _pkt_line(data: str) -> bytes:
+    """Encode ``data`` as a single pkt-line."""
+    encoded = data.encode("utf-8")
+    return f"{len(encoded) + 4:04x}".encode("ascii") + encoded
+
+
+def _parse_pkt_refs(payload: bytes) -> Iterator[tuple[str, str]]:
+    """Yield ``(sha, ref)`` pairs from a pkt-line encoded ref advertisement.
+
+    :param payload: Raw response body.
+    :raises GitError: When a pkt-line length header is malformed.
+    """
+    pos = 0
+    size = len(payload)
+    while pos + 4 <= size:
+        try:
+            length = int(payload[pos : pos + 4], 16)
+        except ValueError as exc:
+            raise GitError("Malformed pkt-line in ref advertisement") from exc
+        if length < 4:
+            pos += 4
+            continue
+        line = payload[pos + 4 : pos + length]
+        pos += length
+        if line.startswith(b"#"):
+            continue
+        if line.startswith(b"ERR "):
+            raise GitError(line[4:].strip().decode("utf-8", "replace"))
+        line = line.rstrip(b"\n").split(b"\0", 1)[0]
+        sha, _, rest = line.partition(b" ")
+        ref = rest.split(b" ", 1)[0]
+        if not _OBJECT_ID_PATTERN.fullmatch(sha):
+            raise GitError("Unexpected line in ref advertisement")
+        if ref:
+            yield sha.decode("ascii"), ref.decode("utf-8", "replace")
+
+
+def _remote_refspec(ref_type: RefType | str, ref_name: str) -> str:
+    """Return the fully qualified ref for a branch or tag name."""
+    ref_type_str = ref_type.value if hasattr(ref_type, "value") else ref_type
+    if ref_type_str == "branch":
+        return f"refs/heads/{ref_name}"
+    return f"refs/tags/{ref_name}"
 
 
-def _prepare_ssh_env(deploy_key: str | None, ssh_workdir: Path | None) -> tuple[dict[str, str] | None, Path | None]:
-    """Generate a temporary SSH key file and return env overrides.
+def _git_env(repo_url: str, token: str | None, deploy_key: str | None) -> dict[str, str] | None:
+    """Return environment overrides carrying the credentials for ``repo_url``.
 
-    :param deploy_key: Private key contents to persist temporarily.
-    :param ssh_workdir: Directory for storing the ephemeral key.
-    :returns: Tuple of ``(env, key_path)`` used by git commands.
+    The token is sent as a basic-auth ``http.<url>.extraHeader`` set through
+    ``GIT_CONFIG_*`` variables, so it never appears on the command line, in
+    build logs or :class:`GitError` messages, or in the mirror's configuration.
+    """
+    env = _ssh_env(deploy_key)
+    if not token or not repo_url.startswith("http"):
+        return env
+    parts = urlsplit(repo_url)
+    if parts.username:
+        return env
+    env = env if env is not None else os.environ.copy()
+    index = int(env.get("GIT_CONFIG_COUNT") or 0)
+    credentials = base64.b64encode(f"{token}:".encode("utf-8")).decode("ascii")
+    env["GIT_CONFIG_COUNT"] = str(index + 1)
+    env[f"GIT_CONFIG_KEY_{index}"] = f"http.{parts.scheme}://{parts.netloc}/.extraHeader"
+    env[f"GIT_CONFIG_VALUE_{index}"] = f"Authorization: Basic {credentials}"
+    return env
+
+
+def _ssh_env(deploy_key: str | None) -> dict[str, str] | None:
+    """Return environment overrides making git use ``deploy_key`` over SSH.
+
+    :param deploy_key: Private key contents, or ``None`` for the default SSH setup.
+    :returns: Environment for git commands, or ``None`` to inherit ours.
     """
     if not deploy_key:
-        return None, None
-    key_dir = Path(ssh_workdir or (settings.data_dir / "ssh_keys"))
-    key_dir.mkdir(parents=True, exist_ok=True)
-    key_path = key_dir / f"deploy_{uuid.uuid4().hex}"
-    key_path.write_text(deploy_key.strip() + ("\n" if not deploy_key.endswith("\n") else ""))
-    os.chmod(key_path, 0o600)
-    logger.debug("Created temporary deploy key at %s", key_path)
+        return None
+    key_path = _deploy_key_file(deploy_key)
     env = os.environ.copy()
-    env["GIT_SSH_COMMAND"] = f"ssh -i {key_path} -o StrictHostKeyChecking=no"
-    return env, key_path
+    env["GIT_SSH_COMMAND"] = f"ssh -i {shlex.quote(str(key_path))} -o StrictHostKeyChecking=no"
+    return env
 
 
-def _cleanup_ssh_key(key_path: Path | None) -> None:
-    """Remove an on-disk SSH key once it is no longer needed.
+def _deploy_key_file(deploy_key: str) -> Path:
+    """Return the key file for ``deploy_key``, writing it on first use.
 
-    :param key_path: Path to delete.
+    Each distinct key is written once per process, to
+    :data:`SSH_KEY_TMPFS_DIR` when it is available so it never reaches
+    persistent storage, and removed by :func:`discard_deploy_key` or when the
+    interpreter exits.
     """
-    if key_path and key_path.exists():
-        logger.debug("Deleting temporary deploy key %s", key_path)
-        key_path.unlink()
+    digest = _deploy_key_digest(deploy_key)
+    with _SSH_KEY_FILES_LOCK:
+        key_path = _SSH_KEY_FILES.get(digest)
+        if key_path is not None and key_path.exists():
+            return key_path
+        if SSH_KEY_TMPFS_DIR.is_dir() and os.access(SSH_KEY_TMPFS_DIR, os.W_OK | os.X_OK):
+            key_dir = SSH_KEY_TMPFS_DIR
+        else:
+            key_dir = settings.data_dir / "ssh_keys"
+            key_dir.mkdir(parents=True, exist_ok=True)
+        # mkstemp creates the file with mode 0600, so the key is never readable by others.
+        fd, name = tempfile.mkstemp(prefix="deploy_", dir=key_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(deploy_key.strip() + "\n")
+        key_path = Path(name)
+        logger.debug("Created deploy key file %s", key_path)
+        _SSH_KEY_FILES[digest] = key_path
+        return key_path
+
+
+def discard_deploy_key(deploy_key: str | None) -> None:
+    """Delete the key file written for ``deploy_key``, if any.
+
+    Call when a repository's key is replaced or the repository is deleted so
+    retired private keys do not linger until the process exits. A key still
+    used by another repository is written again on its next use.
+    """
+    if not deploy_key:
+        return
+    with _SSH_KEY_FILES_LOCK:
+        key_path = _SSH_KEY_FILES.pop(_deploy_key_digest(deploy_key), None)
+    if key_path is not None:
+        key_path.unlink(missing_ok=True)
+        logger.debug("Removed deploy key file %s", key_path)
+
+
+def _deploy_key_digest(deploy_key: str) -> str:
+    """Key the per-process key file cache without keeping the key itself."""
+    return hashlib.blake2b(deploy_key.strip().encode("utf-8"), digest_size=16).hexdigest()
+
+
+@atexit.register
+def _remove_deploy_key_files() -> None:
+    """Delete every deploy key file written by this process."""
+    with _SSH_KEY_FILES_LOCK:
+        for key_path in _SSH_KEY_FILES.values():
+            key_path.unlink(missing_ok=True)
+        _SSH_KEY_FILES.clear()
@@ -1,13 +1,17 @@
 import logging
 
 
-def init_logging() -> None:
-    """Initialize logging configuration for the application."""
+def init_logging(level: int = logging.DEBUG) -> None:
+    """Initialize logging configuration for the application.
+
+    :param level: Root logger level; records below it are dropped before a
+        :class:`logging.LogRecord` is even created.
+    """
     
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
+    root_logger.setLevel(level)
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
+    console_handler.setLevel(level)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(formatter)
     root_logger.addHandler(console_handler)
\ No newline at end of file
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 def main() -> None:
     """Run uvicorn with the application factory configured."""
-    init_logging()
+    init_logging(logging.INFO if settings.environment == "prod" else logging.DEBUG)
     logger.info("Starting sphinx-server on %s:%s", settings.host, settings.port)
     uvicorn.run(
         "sphinx_server.app:get_app",
@@ -0,0 +1,37 @@
+"""ASGI middleware used by the Sphinx Server application."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+SESSIONLESS_PREFIXES: tuple[str, ...] = ("/assets/",)
+
+
+class LazySessionMiddleware(SessionMiddleware):
+    """Session middleware that skips cookie handling for session-less paths.
+
+    Static assets never read ``request.session``, so they bypass the signed
+    cookie decode/encode entirely. ``/artifacts`` is intentionally *not* skipped
+    because private documentation relies on the session for access control.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret_key: str,
+        skip_prefixes: tuple[str, ...] = SESSIONLESS_PREFIXES,
+        **kwargs: Any,
+    ) -> None:
+        """Store the prefixes to bypass and configure the wrapped middleware."""
+        super().__init__(app, secret_key, **kwargs)
+        self.skip_prefixes = skip_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Forward session-less requests directly to the application."""
+        if scope["type"] == "http" and scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -6,6 +6,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index, event, text
 from sqlalchemy.orm import relationship as sa_relationship
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -129,19 +130,30 @@ class TrackedTarget(SQLModel, table=True):
 
 class Build(SQLModel, table=True):
     """Build work model"""
+    __table_args__ = (
+        Index(
+            "ix_build_active_target",
+            "target_id",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active = true"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     repository_id: int = Field(foreign_key="repository.id")
     target_id: int = Field(foreign_key="trackedtarget.id")
     status: BuildStatus = Field(default=BuildStatus.queued)
+    is_active: bool = Field(default=True, description="True while the build is queued or running")
     ref_name: str
     sha: Optional[str] = None
     log_path: Optional[str] = None
     artifact_path: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     duration_seconds: Optional[float] = None
     triggered_by: Optional[str] = Field(default="manual")  # manual or auto
+    force: bool = Field(default=False, description="Rebuild even if the SHA was already built")
 
     repository: Repository | None = Relationship(
         sa_relationship=sa_relationship(
@@ -157,3 +169,13 @@ class Build(SQLModel, table=True):
             foreign_keys="Build.target_id",
         )
     )
+
+
+ACTIVE_BUILD_STATUSES = frozenset({BuildStatus.queued, BuildStatus.running})
+
+
+@event.listens_for(Build, "before_insert")
+@event.listens_for(Build, "before_update")
+def _sync_build_is_active(mapper, connection, target: Build) -> None:
+    """Keep the denormalized ``is_active`` flag in step with ``status``."""
+    target.is_active = target.status in ACTIVE_BUILD_STATUSES
@@ -0,0 +1,188 @@
+"""Static file responses backed by an in-memory cache of small files."""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Mapping
+
+import anyio
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+SMALL_FILE_MAX_BYTES = 256 * 1024
+SMALL_FILE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class SmallFileCache:
+    """Bounded LRU of small file bodies validated against ``mtime``/size.
+
+    Hits skip ``open``/``read`` entirely and matching ``If-None-Match`` headers
+    are answered with a bare ``304``. Misses are read in a worker thread and
+    ``Range`` requests are left to :class:`FileResponse`.
+    """
+
+    def __init__(
+        self,
+        max_file_bytes: int = SMALL_FILE_MAX_BYTES,
+        max_total_bytes: int = SMALL_FILE_CACHE_BYTES,
+    ) -> None:
+        """Configure per-file and total size limits for cached bodies."""
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self._entries: OrderedDict[str, tuple[int, int, bytes, str]] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def response(
+        self,
+        path: str | Path,
+        stat_result: os.stat_result,
+        request_headers: Mapping[str, str],
+        cache_control: str,
+    ) -> Response | None:
+        """Return a cached (or ``304``) response, or ``None`` when the cache does not apply.
+
+        :param path: File to serve.
+        :param stat_result: Fresh ``os.stat`` result for ``path``.
+        :param request_headers: Incoming request headers.
+        :param cache_control: ``Cache-Control`` header value to send.
+        """
+        if stat_result.st_size > self.max_file_bytes or "range" in request_headers:
+            return None
+        key = str(path)
+        etag = _etag_for(stat_result)
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "cache-control": cache_control,
+        }
+        if _etag_matches(etag, request_headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        entry = self._lookup(key, stat_result)
+        if entry is None:
+            return _CachingFileResponse(self, key, stat_result, etag, headers)
+        body, _ = entry
+        media_type = mimetypes.guess_type(key)[0] or "text/plain"
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def _lookup(self, key: str, stat_result: os.stat_result) -> tuple[bytes, str] | None:
+        """Return the cached body/etag when it still matches the file on disk."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            mtime_ns, size, body, etag = entry
+            if mtime_ns != stat_result.st_mtime_ns or size != stat_result.st_size:
+                del self._entries[key]
+                self._total_bytes -= len(body)
+                return None
+            self._entries.move_to_end(key)
+            return body, etag
+
+    def _store(self, key: str, stat_result: os.stat_result, body: bytes, etag: str) -> None:
+        """Insert a body into the cache, evicting least-recently-used entries."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous[2])
+            self._entries[key] = (stat_result.st_mtime_ns, stat_result.st_size, body, etag)
+            self._total_bytes += len(body)
+            while self._total_bytes > self.max_total_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted[2])
+
+
+class _CachingFileResponse(FileResponse):
+    """:class:`FileResponse` that reads a small file off the event loop and caches it."""
+
+    def __init__(
+        self,
+        cache: SmallFileCache,
+        key: str,
+        stat_result: os.stat_result,
+        etag: str,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Prepare the regular file response headers for ``key``."""
+        super().__init__(key, stat_result=stat_result, headers=headers)
+        self.cache = cache
+        self.etag = etag
+        self.cached_stat = stat_result
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Read the body in a worker thread, store it, then send it."""
+        if scope.get("method") == "HEAD":
+            await super().__call__(scope, receive, send)
+            return
+        try:
+            body = await anyio.to_thread.run_sync(Path(self.path).read_bytes)
+        except OSError:
+            body = None
+        if body is None or len(body) != self.cached_stat.st_size:
+            # The file vanished or changed since it was stat'ed; stream it normally.
+            await super().__call__(scope, receive, send)
+            return
+        self.cache._store(str(self.path), self.cached_stat, body, self.etag)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """Compare ``etag`` against an ``If-None-Match`` header using weak comparison."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _etag_for(stat_result: os.stat_result) -> str:
+    """Derive an ETag from file modification time and size."""
+    token = f"{stat_result.st_mtime_ns}-{stat_result.st_size}".encode()
+    return f'"{hashlib.md5(token, usedforsecurity=False).hexdigest()}"'
+
+
+file_cache = SmallFileCache()
+
+
+class CachedStaticFiles(StaticFiles):
+    """:class:`StaticFiles` variant answering small files from :data:`file_cache`."""
+
+    def __init__(
+        self,
+        *args: Any,
+        cache: SmallFileCache | None = file_cache,
+        cache_control: str = "public, max-age=60",
+        **kwargs: Any,
+    ) -> None:
+        """Configure the small-file cache used in front of :class:`FileResponse`."""
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.cache_control = cache_control
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        """Serve small files from the cache, else defer to :class:`StaticFiles`."""
+        if self.cache is not None and status_code == 200:
+            cached = self.cache.response(full_path, stat_result, Headers(scope=scope), self.cache_control)
+            if cached is not None:
+                return cached
+        return super().file_response(full_path, stat_result, scope, status_code)
@@ -5,6 +5,11 @@ from __future__ import annotations
 from datetime import datetime, timezone
 
 
+def utc_now() -> datetime:
+    """Return the current UTC time as a naive datetime, the storage convention."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 def format_local_datetime(dt: datetime | None, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
     """Return a localized string for a UTC timestamp.
 
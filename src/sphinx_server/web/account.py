@@ -14,6 +14,7 @@ from sqlmodel import Session, select
 from ..auth import (
     get_optional_user,
     hash_password,
+    password_needs_rehash,
     require_admin,
     require_user,
     verify_password,
@@ -76,9 +77,13 @@ def _render_user_admin(
 
 
 @router.get("/login")
-def login_form(request: Request, next: str | None = None):
+def login_form(
+    request: Request,
+    next: str | None = None,
+    session: Session = Depends(get_session),
+):
     """Render the login form."""
-    user = get_optional_user(request)
+    user = get_optional_user(request, session)
     if user:
         target = "/account?force=password" if user.must_change_password else _safe_next_url(next)
         return RedirectResponse(url=target, status_code=303)
@@ -111,6 +116,8 @@ def login_action(
         )
     request.session["user_id"] = user.id
     request.session["role"] = user.role.value
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
     user.last_login_at = datetime.utcnow()
     user.updated_at = datetime.utcnow()
     session.add(user)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Annotated, Literal
 
@@ -14,13 +15,14 @@ import hashlib
 import json
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request
-from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from sphinx_server.auth import require_admin, require_contributor
-from sphinx_server.build_service import BuildQueue, enqueue_target_build
+from sphinx_server.auto_builder import AutoBuildMonitor
+from sphinx_server.build_service import BuildQueue, enqueue_target_build, pending_builds, repo_mirror_dir
 from sphinx_server.config import (
     settings,
     apply_settings_overrides,
@@ -28,7 +30,7 @@ from sphinx_server.config import (
     persist_env_settings,
 )
 from sphinx_server.database import get_session
-from sphinx_server.git_utils import GitError, list_remote_refs
+from sphinx_server.git_utils import GitError, discard_deploy_key, list_remote_refs
 from sphinx_server.model_converter import convert_build_to_ui_model
 from sphinx_server.models import Build, ProviderType, RefType, Repository, TrackedTarget
 from sphinx_server.time_utils import format_local_datetime
@@ -59,6 +61,17 @@ def get_queue(request: Request) -> BuildQueue:
     return request.app.state.build_queue
 
 
+def get_monitor(request: Request) -> AutoBuildMonitor:
+    """Extract the shared :class:`AutoBuildMonitor` from the FastAPI app state."""
+    return request.app.state.auto_monitor
+
+
+def _queue_full_error() -> HTTPException:
+    """Return the error raised when the build queue refuses more work."""
+    logger.warning("Build queue is full; refusing manual build")
+    return HTTPException(status_code=503, detail="Build queue is full, try again later")
+
+
 def _safe_unlink(path: str | None) -> None:
     """Delete a file while ignoring errors such as missing paths."""
     if not path:
@@ -114,13 +127,7 @@ def admin_index(
         .order_by(Repository.name)
     )
     repos = session.exec(repo_stmt).all()
-    build_stmt = (
-        select(Build)
-        .options(selectinload(Build.repository), selectinload(Build.target))
-        .order_by(Build.created_at.desc())
-        .limit(10)
-    )
-    builds = session.exec(build_stmt).all()
+    builds = pending_builds(session, limit=10)
     logger.debug(f"Admin dashboard: fetched {len(repos)} repos and {len(builds)} builds")
 
     out_builds = []
@@ -298,10 +305,13 @@ async def update_repo(
     repo.docs_path = docs_path or "docs"
     repo.public_docs = bool(public_docs)
     repo.auth_token = auth_token
+    previous_key = repo.deploy_key
     if deploy_key is not None and deploy_key.strip() != "":
         repo.deploy_key = deploy_key.strip()
     session.add(repo)
     session.commit()
+    if previous_key != repo.deploy_key:
+        discard_deploy_key(previous_key)
     logger.info("Updated repository %s (%s)", repo.id, repo.name)
     return RedirectResponse(url=f"/admin/repos/{repo_id}", status_code=303)
 
@@ -388,7 +398,7 @@ def repo_builds_json(
     signature = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
     if token and token == signature:
         return Response(status_code=204, headers={"X-Build-Token": signature})
-    return JSONResponse({"builds": payload, "token": signature})
+    return ORJSONResponse({"builds": payload, "token": signature})
 
 
 @router.post("/repos/{repo_id}/delete")
@@ -409,9 +419,12 @@ async def delete_repo(
         repo_cache = settings.repo_cache_dir / f"repo_{repo.id}"
         artifacts_root = settings.build_output_dir / str(repo.id)
         _safe_rmtree(repo_cache)
+        _safe_rmtree(repo_mirror_dir(repo.id))
         _safe_rmtree(artifacts_root)
+        deploy_key = repo.deploy_key
         session.delete(repo)
         session.commit()
+        discard_deploy_key(deploy_key)
     return RedirectResponse(url="/admin", status_code=303)
 
 
@@ -423,6 +436,7 @@ async def add_target(
     auto_build: Annotated[bool | None, Form()] = False,
     environment_manager: Annotated[str | None, Form()] = None,
     session: Session = Depends(get_session),
+    monitor: AutoBuildMonitor = Depends(get_monitor),
 ):
     """Create a tracked branch or tag for the given repository."""
     repo = session.get(Repository, repo_id)
@@ -439,6 +453,8 @@ async def add_target(
     )
     session.add(target)
     session.commit()
+    if target.auto_build:
+        monitor.poke()
     return RedirectResponse(url=f"/admin/repos/{repo_id}", status_code=303)
 
 
@@ -471,7 +487,10 @@ async def build_target(
 ):
     """Enqueue a manual build for the specified target."""
     logger.info("Manual build requested for target %s", target_id)
-    await enqueue_target_build(target_id, session, queue, triggered_by="manual")
+    try:
+        await enqueue_target_build(target_id, session, queue, triggered_by="manual", force=True)
+    except asyncio.QueueFull:
+        raise _queue_full_error() from None
     referer = request.headers.get("referer") or "/admin"
     return RedirectResponse(url=referer, status_code=303)
 
@@ -488,11 +507,11 @@ def available_refs(
         logger.error("Repository %s not found when listing refs", repo_id)
         raise HTTPException(status_code=404, detail="Repository not found")
     try:
-        refs = list_remote_refs(repo.url, repo.auth_token, ref_type.value)
+        refs = list_remote_refs(repo.url, repo.auth_token, ref_type.value, deploy_key=repo.deploy_key)
     except GitError as exc:
         logger.error("Failed to list refs for repo %s: %s", repo_id, exc)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-    return JSONResponse({"refs": refs})
+    return ORJSONResponse({"refs": refs})
 
 
 @router.get("/builds/{build_id}/log")
@@ -597,6 +616,7 @@ async def update_target(
     auto_build: Annotated[bool | None, Form()] = False,
     environment_manager: Annotated[str | None, Form()] = None,
     session: Session = Depends(get_session),
+    monitor: AutoBuildMonitor = Depends(get_monitor),
 ):
     """Persist changes to a tracked target."""
     target = session.get(TrackedTarget, target_id)
@@ -608,6 +628,8 @@ async def update_target(
     target.environment_manager = _resolve_environment_manager(environment_manager)
     session.add(target)
     session.commit()
+    if target.auto_build:
+        monitor.poke()
     logger.info("Updated target %s for repo %s", target_id, target.repository_id)
     return RedirectResponse(url=f"/admin/repos/{target.repository_id}", status_code=303)
 
@@ -647,14 +669,24 @@ async def bulk_target_action(
     """Execute bulk build or delete actions on selected targets."""
     if action not in {"build", "delete"}:
         raise HTTPException(status_code=400, detail="Unsupported action")
+    selected: list[TrackedTarget] = []
     for target_id in target_ids:
         target = session.get(TrackedTarget, target_id)
         if not target or target.repository_id != repo_id:
             logger.debug("Skipping target %s during bulk action %s", target_id, action)
             continue
+        selected.append(target)
+    # Refuse the whole batch up front so a full queue never leaves it half queued.
+    if action == "build" and not queue.has_room(len(selected)):
+        raise _queue_full_error()
+    for target in selected:
+        target_id = target.id
         if action == "build":
             logger.info("Bulk build requested for target %s", target_id)
-            await enqueue_target_build(target_id, session, queue, triggered_by="manual")
+            try:
+                await enqueue_target_build(target_id, session, queue, triggered_by="manual", force=True)
+            except asyncio.QueueFull:
+                raise _queue_full_error() from None
         elif action == "delete":
             logger.warning("Bulk delete for target %s", target_id)
             builds = session.exec(select(Build).where(Build.target_id == target_id)).all()
@@ -697,4 +729,4 @@ def generate_ssh_key(
             raise HTTPException(status_code=500, detail=f"ssh-keygen failed: {exc.stderr.decode()}" if exc.stderr else "ssh-keygen failed") from exc
         private_key = key_path.read_text()
         public_key = (key_path.with_suffix(".pub")).read_text()
-        return JSONResponse({"private_key": private_key, "public_key": public_key})
+        return ORJSONResponse({"private_key": private_key, "public_key": public_key})
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 import logging
+import stat
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
@@ -18,6 +20,7 @@ from ..auth import get_optional_user, require_user
 from ..config import settings
 from ..database import get_session
 from ..models import Build, Repository, TrackedTarget
+from ..static_files import file_cache
 
 router = APIRouter(tags=["docs"], dependencies=[Depends(require_user)])
 
@@ -32,7 +35,7 @@ def docs_index(request: Request, session: Session = Depends(get_session)):
     logger.debug("Rendering docs index")
     repo_stmt = select(Repository).options(selectinload(Repository.tracked_targets))
     all_repos = session.exec(repo_stmt).all()
-    user = get_optional_user(request)
+    user = get_optional_user(request, session)
     if user:
         visible_repos = all_repos
     else:
@@ -94,7 +97,7 @@ def repo_refs(repo_id: int, request: Request, session: Session = Depends(get_ses
                 "has_artifact": bool(artifact),
             }
         )
-    return JSONResponse({"repo": {"id": repo.id, "name": repo.name}, "targets": targets})
+    return ORJSONResponse({"repo": {"id": repo.id, "name": repo.name}, "targets": targets})
 
 
 @router.get("/docs/{repo_id}/{target_id}")
@@ -142,7 +145,7 @@ def artifact_file(
         logger.error("Repo %s not found when serving artifact %s", repo_id, requested_path)
         raise HTTPException(status_code=404, detail="Repository not found")
     _ensure_repo_docs_access(repo, request, session)
-    base_dir = (settings.build_output_dir / str(repo_id)).resolve()
+    base_dir = _resolved_build_root(settings.build_output_dir) / str(repo_id)
     if not base_dir.exists():
         raise HTTPException(status_code=404, detail="Artifact directory missing")
     relative = Path(requested_path) if requested_path else Path()
@@ -157,9 +160,22 @@ def artifact_file(
             target_path.relative_to(base_dir)
         except ValueError:
             raise HTTPException(status_code=403, detail="Invalid artifact path")
-    if not target_path.exists():
+    try:
+        stat_result = target_path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="Artifact not found")
-    return FileResponse(target_path)
+    cached = file_cache.response(target_path, stat_result, request.headers, cache_control="no-cache")
+    if cached is not None:
+        return cached
+    return FileResponse(target_path, stat_result=stat_result)
+
+
+@lru_cache(maxsize=4)
+def _resolved_build_root(build_output_dir: Path) -> Path:
+    """Resolve the artifact root once per configured build directory."""
+    return build_output_dir.resolve()
 
 
 def _latest_artifacts(builds: list[Build]) -> dict[int, Build]: